@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'Label Studio Publishing',
-    'version': '19.0.1.0.0',
+    'version': '19.0.1.0.2',
     'category': 'Industries',
     'summary': 'Complete Record Label, Recording Studio & Music Publishing Management',
     'description': """
@@ -58,6 +58,7 @@
         'views/music_recording_views.xml',
         'views/music_release_views.xml',
         'views/music_rights_views.xml',
+        'views/catalog_dedup_views.xml',
         
         # Views - Studio
         'views/studio_room_views.xml',
@@ -80,6 +81,9 @@
         
         # Wizards
         'views/import_export_wizard_views.xml',
+        'views/studio_booking_recurrence_views.xml',
+        'views/ddex_export_wizard_views.xml',
+        'views/catalog_bulk_import_views.xml',
         
         # Reports
         'reports/royalty_statement_template.xml',
@@ -1,17 +1,26 @@
 # -*- coding: utf-8 -*-
 
 import base64
+import csv
+import io
 from collections import defaultdict
 from datetime import datetime, date
 from dateutil.relativedelta import relativedelta
 
-from odoo import http, fields, _
+from odoo import api, http, fields, _
 from odoo.http import request
 from odoo.exceptions import AccessError, UserError
 from odoo.addons.portal.controllers.portal import CustomerPortal, pager as portal_pager
 from odoo.addons.portal.controllers.portal import get_records_pager
 from odoo.tools import groupby as groupbyelem
 
+# Usage lines fetched per keyset page when streaming portal exports
+USAGE_EXPORT_PAGE_SIZE = 2000
+USAGE_EXPORT_FIELDS = [
+    'period_start', 'period_end', 'track_name', 'artist_name', 'service',
+    'territory_code', 'usage_type', 'units', 'gross_amount', 'net_amount',
+]
+
 
 class LabelStudioPortal(CustomerPortal):
     
@@ -23,24 +32,20 @@ class LabelStudioPortal(CustomerPortal):
         # Check if user has portal access to label studio features
         if partner.is_artist or partner.is_writer or partner.is_studio_client:
             
+            # Counters are stored on the partner and recomputed when
+            # statements or bookings change, so a hit costs no count query
             if 'royalty_statement_count' in counters:
-                values['royalty_statement_count'] = request.env['royalty.statement'].search_count([
-                    ('partner_id', '=', partner.id),
-                    ('state', 'in', ['draft', 'processing', 'sent', 'approved', 'paid'])
-                ]) if self._check_portal_access('royalty.statement') else 0
+                values['royalty_statement_count'] = partner.portal_statement_count \
+                    if self._check_portal_access('royalty.statement') else 0
             
             if 'studio_booking_count' in counters:
-                values['studio_booking_count'] = request.env['studio.booking'].search_count([
-                    ('client_id', '=', partner.id)
-                ]) if self._check_portal_access('studio.booking') else 0
+                values['studio_booking_count'] = partner.portal_booking_count \
+                    if self._check_portal_access('studio.booking') else 0
             
             if 'pending_approval_count' in counters:
                 approval_count = 0
                 if self._check_portal_access('royalty.statement'):
-                    approval_count += request.env['royalty.statement'].search_count([
-                        ('partner_id', '=', partner.id),
-                        ('state', '=', 'sent')
-                    ])
+                    approval_count += partner.portal_pending_statement_count
                 if self._check_portal_access('publ.split'):
                     approval_count += request.env['publ.split'].search_count([
                         ('writer_id', '=', partner.id),
@@ -111,25 +116,29 @@ class LabelStudioPortal(CustomerPortal):
         # Get statements
         statements = request.env['royalty.statement'].search(domain, order=order, limit=self._items_per_page, offset=pager['offset'])
 
-        # Summary statistics
-        all_statements = request.env['royalty.statement'].search(domain)
+        # Summary statistics, aggregated in the database
         summary_stats = {
-            'total_earnings': sum(stmt.total_amount for stmt in all_statements),
-            'total_statements': len(all_statements),
-            'pending_approval': len(all_statements.filtered(lambda s: s.state == 'sent')),
-            'ytd_earnings': sum(stmt.total_amount for stmt in all_statements.filtered(
-                lambda s: s.period_start.year == today.year
-            )),
+            'total_earnings': 0.0,
+            'total_statements': 0,
+            'pending_approval': 0,
+            'ytd_earnings': 0.0,
         }
-
-        # Recent activity (last 3 months)
-        recent_domain = domain + [('period_start', '>=', today - relativedelta(months=3))]
-        recent_usage = request.env['royalty.usage.line'].search([
-            '|',
-            ('recording_id.main_artist_ids', 'in', [partner.id]),
-            ('work_id.writer_ids', 'in', [partner.id]),
-            ('period_start', '>=', today - relativedelta(months=3))
-        ], limit=10, order='period_start desc')
+        for state, period_year, count, amount in request.env['royalty.statement']._read_group(
+            domain, ['state', 'period_start:year'], ['__count', 'total_amount:sum'],
+        ):
+            summary_stats['total_earnings'] += amount
+            summary_stats['total_statements'] += count
+            if state == 'sent':
+                summary_stats['pending_approval'] += count
+            if period_year and period_year.year == today.year:
+                summary_stats['ytd_earnings'] += amount
+
+        # Recent activity (last 3 months), served from the ownership index
+        recent_usage = request.env['royalty.usage.partner.rel'].search([
+            ('partner_id', '=', partner.id),
+            ('role', 'in', ['main_artist', 'writer']),
+            ('period_start', '>=', today - relativedelta(months=3)),
+        ], limit=10).usage_line_id
 
         values.update({
             'statements': statements,
@@ -166,24 +175,24 @@ class LabelStudioPortal(CustomerPortal):
                 'error_message': _('The requested statement could not be found or you do not have access to it.')
             })
 
-        # Group usage lines by recording/work
+        # Group the stored summary rows by recording/work
         usage_groups = defaultdict(lambda: {
-            'lines': [],
+            'rows': [],
             'total_units': 0,
             'total_amount': 0.0,
             'territories': set(),
             'services': set()
         })
 
-        for line in statement.usage_line_ids:
-            key = line.recording_id.title if line.recording_id else (line.work_id.title if line.work_id else 'Unmatched')
-            usage_groups[key]['lines'].append(line)
-            usage_groups[key]['total_units'] += line.units
-            usage_groups[key]['total_amount'] += line.net_amount
-            if line.territory_code:
-                usage_groups[key]['territories'].add(line.territory_code)
-            if line.service:
-                usage_groups[key]['services'].add(line.service)
+        for row in statement._get_summary():
+            key = row._get_title()
+            usage_groups[key]['rows'].append(row)
+            usage_groups[key]['total_units'] += row.units
+            usage_groups[key]['total_amount'] += row.net_amount
+            if row.territory_code:
+                usage_groups[key]['territories'].add(row.territory_code)
+            if row.service:
+                usage_groups[key]['services'].add(row.service)
 
         # Convert territories and services sets to lists
         for group in usage_groups.values():
@@ -239,29 +248,32 @@ class LabelStudioPortal(CustomerPortal):
         ])
 
         works = request.env['music.work'].search([
-            ('writer_ids', 'in', [partner.id])
+            ('composer_ids', 'in', [partner.id])
         ])
 
         releases = request.env['music.release'].search([
             ('recording_ids', 'in', recordings.ids)
         ])
 
-        # Performance stats
+        # Performance stats, aggregated per territory over the ownership index.
+        # Earnings follow main artist and writer credits only, as in the deal reports;
+        # featured appearances are listed above but not paid through these lines.
         today = date.today()
-        ytd_usage = request.env['royalty.usage.line'].search([
-            '|',
-            ('recording_id', 'in', recordings.ids),
-            ('work_id', 'in', works.ids),
-            ('period_start', '>=', date(today.year, 1, 1))
-        ])
+        ytd_by_territory = request.env['royalty.usage.line']._read_group([
+            ('partner_rel_ids', 'any', [
+                ('partner_id', '=', partner.id),
+                ('role', 'in', ('main_artist', 'writer')),
+            ]),
+            ('period_start', '>=', date(today.year, 1, 1)),
+        ], ['territory_code'], ['units:sum', 'net_amount:sum'])
 
         catalog_stats = {
             'recordings_count': len(recordings),
             'works_count': len(works),
             'releases_count': len(releases),
-            'ytd_streams': sum(line.units for line in ytd_usage),
-            'ytd_earnings': sum(line.net_amount for line in ytd_usage),
-            'territories_count': len(set(line.territory_code for line in ytd_usage if line.territory_code)),
+            'ytd_streams': sum(units for _territory, units, _amount in ytd_by_territory),
+            'ytd_earnings': sum(amount for _territory, _units, amount in ytd_by_territory),
+            'territories_count': len([territory for territory, _units, _amount in ytd_by_territory if territory]),
         }
 
         values = {
@@ -387,6 +399,26 @@ class LabelStudioPortal(CustomerPortal):
 
         return request.render("label_studio_publishing.portal_studio_booking_detail", values)
 
+    @http.route(['/my/studio/slots'], type='json', auth="user")
+    def portal_studio_free_slots(self, duration_hours=None, date_from=None, date_to=None,
+                                 room_id=None, engineer_id=None, package_id=None, limit=5, **kw):
+        """Earliest free studio slots for the portal booking calendar"""
+        partner = request.env.user.partner_id
+        if not partner.is_studio_client:
+            raise AccessError(_('You do not have access to studio bookings.'))
+
+        # Availability needs every booking, but only free intervals are returned
+        slots = request.env['studio.slot.finder'].sudo().find_slots(
+            duration_hours=duration_hours,
+            date_from=date_from,
+            date_to=date_to,
+            room_id=int(room_id) if room_id else None,
+            engineer_id=int(engineer_id) if engineer_id else None,
+            package_id=int(package_id) if package_id else None,
+            limit=min(int(limit or 5), 50),
+        )
+        return {'slots': slots}
+
     @http.route(['/my/studio/request'], type='http', auth="user", website=True, methods=['GET', 'POST'], csrf=True)
     def portal_studio_booking_request(self, **post):
         """Studio booking request form"""
@@ -506,9 +538,8 @@ class LabelStudioPortal(CustomerPortal):
         if statement.partner_id != partner:
             return request.not_found()
         
-        # Generate PDF report
-        report = request.env.ref('label_studio_publishing.royalty_statement_report')
-        pdf_content, _ = report._render_qweb_pdf([statement_id])
+        # Served from the cached attachment unless the statement changed
+        pdf_content = statement._get_report_pdf()
         
         filename = f"royalty_statement_{statement.id}_{statement.period_start.strftime('%Y_%m')}.pdf"
         
@@ -533,51 +564,77 @@ class LabelStudioPortal(CustomerPortal):
 
         # Get usage lines
         domain = [
-            '|',
-            ('recording_id.main_artist_ids', 'in', [partner.id]),
-            ('work_id.writer_ids', 'in', [partner.id]),
+            ('partner_rel_ids', 'any', [
+                ('partner_id', '=', partner.id),
+                ('role', 'in', ['main_artist', 'writer']),
+            ]),
         ]
         if date_from:
             domain.append(('period_start', '>=', date_from))
         if date_to:
             domain.append(('period_end', '<=', date_to))
 
-        usage_lines = request.env['royalty.usage.line'].search(domain)
-
-        # Generate CSV
-        import csv
-        import io
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Header
-        writer.writerow([
-            'Period Start', 'Period End', 'Track', 'Artist', 'Service',
-            'Territory', 'Usage Type', 'Units', 'Gross Amount', 'Net Amount'
-        ])
-        
-        # Data
-        for line in usage_lines:
-            writer.writerow([
-                line.period_start.strftime('%Y-%m-%d') if line.period_start else '',
-                line.period_end.strftime('%Y-%m-%d') if line.period_end else '',
-                line.track_name or '',
-                line.artist_name or '',
-                line.service or '',
-                line.territory_code or '',
-                line.usage_type or '',
-                line.units or 0,
-                line.gross_amount or 0.0,
-                line.net_amount or 0.0,
-            ])
-
         filename = f"usage_data_{partner.name.replace(' ', '_')}_{date.today().strftime('%Y_%m_%d')}.csv"
         
         return request.make_response(
-            output.getvalue(),
+            self._stream_usage_csv(domain),
             headers=[
                 ('Content-Type', 'text/csv'),
                 ('Content-Disposition', f'attachment; filename="{filename}"')
             ]
-        )
\ No newline at end of file
+        )
+
+    def _stream_usage_csv(self, domain):
+        """Yield the usage export as CSV chunks, one keyset page at a time.
+
+        The generator runs after the request cursor is released, so it reads
+        through its own cursor with the requesting user's environment.
+        """
+        registry = request.env.registry
+        uid = request.env.uid
+        context = dict(request.env.context)
+
+        def generate():
+            output = io.StringIO()
+            writer = csv.writer(output)
+            writer.writerow([
+                'Period Start', 'Period End', 'Track', 'Artist', 'Service',
+                'Territory', 'Usage Type', 'Units', 'Gross Amount', 'Net Amount'
+            ])
+            yield output.getvalue().encode('utf-8')
+
+            with registry.cursor() as cr:
+                env = api.Environment(cr, uid, context)
+                UsageLine = env['royalty.usage.line']
+                last_id = 0
+                while True:
+                    usage_lines = UsageLine.search_fetch(
+                        domain + [('id', '>', last_id)],
+                        USAGE_EXPORT_FIELDS,
+                        order='id',
+                        limit=USAGE_EXPORT_PAGE_SIZE,
+                    )
+                    if not usage_lines:
+                        break
+
+                    output.seek(0)
+                    output.truncate()
+                    for line in usage_lines:
+                        writer.writerow([
+                            line.period_start.strftime('%Y-%m-%d') if line.period_start else '',
+                            line.period_end.strftime('%Y-%m-%d') if line.period_end else '',
+                            line.track_name or '',
+                            line.artist_name or '',
+                            line.service or '',
+                            line.territory_code or '',
+                            line.usage_type or '',
+                            line.units or 0,
+                            line.gross_amount or 0.0,
+                            line.net_amount or 0.0,
+                        ])
+                    last_id = usage_lines[-1].id
+                    # Keep the cache flat between pages
+                    usage_lines.invalidate_recordset()
+                    yield output.getvalue().encode('utf-8')
+
+        return generate()
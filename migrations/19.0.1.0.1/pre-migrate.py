@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+
+
+def migrate(cr, version):
+    """Usage-line display names are no longer stored; drop the dead column."""
+    if not version:
+        return
+    cr.execute("ALTER TABLE royalty_usage_line DROP COLUMN IF EXISTS display_name")
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+
+def migrate(cr, version):
+    """Backfill the booking deposit and final invoice links.
+
+    Consolidated deposit invoices used to reference the first booking only;
+    each booking still has its own ``Deposit for Studio Booking <name>`` line.
+    """
+    if not version:
+        return
+    cr.execute(
+        """
+        UPDATE studio_booking booking
+           SET deposit_invoice_id = line.move_id
+          FROM account_move_line line
+          JOIN account_move move ON move.id = line.move_id
+         WHERE booking.deposit_invoice_id IS NULL
+           AND move.move_type = 'out_invoice'
+           AND move.state != 'cancel'
+           AND line.name = 'Deposit for Studio Booking ' || booking.name
+        """
+    )
+    # Final invoices created before final_invoice_id existed were linked through
+    # studio_booking_id only; without this the batch invoicing bills them again.
+    cr.execute(
+        """
+        UPDATE studio_booking booking
+           SET final_invoice_id = final.move_id
+          FROM (
+                SELECT DISTINCT ON (move.studio_booking_id)
+                       move.studio_booking_id AS booking_id, move.id AS move_id
+                  FROM account_move move
+                 WHERE move.studio_booking_id IS NOT NULL
+                   AND move.move_type = 'out_invoice'
+                   AND move.state != 'cancel'
+                   AND NOT EXISTS (
+                        SELECT 1
+                          FROM studio_booking deposit_booking
+                         WHERE deposit_booking.deposit_invoice_id = move.id
+                   )
+                   AND NOT EXISTS (
+                        SELECT 1
+                          FROM account_move_line line
+                         WHERE line.move_id = move.id
+                           AND line.name LIKE 'Deposit for Studio Booking %'
+                   )
+              ORDER BY move.studio_booking_id, move.id DESC
+               ) final
+         WHERE booking.id = final.booking_id
+           AND booking.final_invoice_id IS NULL
+        """
+    )
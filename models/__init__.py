@@ -5,6 +5,7 @@ from . import res_config_settings
 from . import label_anr_lead
 from . import label_deal
 from . import publ_registration
+from . import catalog_dedup
 from . import music_work
 from . import music_recording
 from . import music_release
@@ -12,13 +13,16 @@ from . import music_rights
 from . import studio_room
 from . import studio_equipment
 from . import studio_booking
+from . import studio_slot_finder
 from . import studio_session
 from . import royalty_usage_line
 from . import royalty_rule
 from . import royalty_recoup_ledger
 from . import royalty_statement
+from . import royalty_statement_run
 from . import royalty_payment
 from . import publ_split
 from . import sync_license
 from . import dist_partner
 from . import studio_package
+from . import ddex_ern_builder
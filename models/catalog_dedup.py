@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+# Pairs scoring at least this much become merge proposals
+DEDUP_SCORE_THRESHOLD = 0.85
+# Title blocks larger than this ("Intro", "Untitled") are too generic to pair up
+DEDUP_MAX_BLOCK_SIZE = 50
+# Trigram neighbours looked up per changed record
+DEDUP_TRIGRAM_NEIGHBOURS = 5
+DEDUP_TRIGRAM_THRESHOLD = 0.6
+
+# Qualifiers that never make a different master: remasters, featured credits, content advisories
+RECORDING_NOISE = r'remaster(?:ed)?|feat\.?|ft\.|featuring|explicit|clean|bonus track|digital'
+_RECORDING_QUALIFIER_RE = re.compile(r'[\(\[][^\)\]]*(?:%s)[^\)\]]*[\)\]]' % RECORDING_NOISE, re.I)
+_RECORDING_SUFFIX_RE = re.compile(r'\s+-\s+[^-]*(?:%s).*$' % RECORDING_NOISE, re.I)
+# For compositions every bracketed or dashed qualifier (live, remix, edit...) is noise
+_WORK_QUALIFIER_RE = re.compile(r'[\(\[][^\)\]]*[\)\]]')
+_WORK_SUFFIX_RE = re.compile(r'\s+-\s+.*$')
+_FEAT_RE = re.compile(r'\s+(?:feat\.?|ft\.|featuring)\s+.*$', re.I)
+_NON_WORD_RE = re.compile(r'[^0-9a-z]+')
+
+
+def _fold(title):
+    title = unicodedata.normalize('NFKD', title or '')
+    title = ''.join(char for char in title if not unicodedata.combining(char)).lower()
+    title = title.replace('&', ' and ')
+    return ' '.join(_NON_WORD_RE.sub(' ', title).split())
+
+
+def normalize_recording_title(title):
+    """Blocking key of a recording title: accents, case, punctuation and
+    remaster/featuring qualifiers are dropped; live or edit versions are kept."""
+    title = _RECORDING_QUALIFIER_RE.sub(' ', title or '')
+    title = _RECORDING_SUFFIX_RE.sub('', title)
+    title = _FEAT_RE.sub('', title)
+    return _fold(title)
+
+
+def normalize_work_title(title):
+    """Blocking key of a work title: every version qualifier is dropped."""
+    title = _WORK_QUALIFIER_RE.sub(' ', title or '')
+    title = _WORK_SUFFIX_RE.sub('', title)
+    title = _FEAT_RE.sub('', title)
+    return _fold(title)
+
+
+def normalize_code(code):
+    """ISRC/ISWC/UPC reduced to upper-case alphanumerics for comparisons."""
+    return re.sub(r'[^0-9A-Za-z]', '', code or '').upper()
+
+
+def _overlap(left, right):
+    """Jaccard overlap of two id sets; 0.5 when either side is unknown."""
+    if not left or not right:
+        return 0.5
+    return len(left & right) / len(left | right)
+
+
+class CatalogDuplicateProposal(models.Model):
+    _name = 'catalog.duplicate.proposal'
+    _description = 'Catalog Duplicate Merge Proposal'
+    _order = 'state, score desc, id'
+
+    res_model = fields.Selection([
+        ('music.recording', 'Recording'),
+        ('music.work', 'Work'),
+    ], string='Type', required=True, index=True)
+    master_recording_id = fields.Many2one('music.recording', string='Keep Recording', ondelete='cascade')
+    duplicate_recording_id = fields.Many2one('music.recording', string='Duplicate Recording',
+                                             ondelete='cascade', index=True)
+    master_work_id = fields.Many2one('music.work', string='Keep Work', ondelete='cascade')
+    duplicate_work_id = fields.Many2one('music.work', string='Duplicate Work', ondelete='cascade', index=True)
+    score = fields.Float(string='Score', digits=(3, 2))
+    reason = fields.Char(string='Reason')
+    state = fields.Selection([
+        ('proposed', 'Proposed'),
+        ('merged', 'Merged'),
+        ('dismissed', 'Dismissed'),
+    ], string='Status', default='proposed', required=True, index=True)
+
+    _recording_pair_uniq = models.Constraint(
+        'unique(master_recording_id, duplicate_recording_id)',
+        'This recording pair has already been proposed.',
+    )
+    _work_pair_uniq = models.Constraint(
+        'unique(master_work_id, duplicate_work_id)',
+        'This work pair has already been proposed.',
+    )
+
+    def _get_pair(self):
+        self.ensure_one()
+        if self.res_model == 'music.recording':
+            return self.master_recording_id, self.duplicate_recording_id
+        return self.master_work_id, self.duplicate_work_id
+
+    def action_swap(self):
+        for proposal in self.filtered(lambda p: p.state == 'proposed'):
+            if proposal.res_model == 'music.recording':
+                proposal.write({
+                    'master_recording_id': proposal.duplicate_recording_id.id,
+                    'duplicate_recording_id': proposal.master_recording_id.id,
+                })
+            else:
+                proposal.write({
+                    'master_work_id': proposal.duplicate_work_id.id,
+                    'duplicate_work_id': proposal.master_work_id.id,
+                })
+
+    def action_dismiss(self):
+        self.filtered(lambda p: p.state == 'proposed').write({'state': 'dismissed'})
+
+    def action_merge(self):
+        """Merge every selected duplicate into its master, following chains (A <- B <- C)."""
+        proposals = self.filtered(lambda p: p.state == 'proposed')
+        if not proposals:
+            raise UserError(_('Select at least one open proposal.'))
+        engine = self.env['catalog.dedup.engine']
+        for res_model in ('music.recording', 'music.work'):
+            pairs = [proposal._get_pair() for proposal in proposals if proposal.res_model == res_model]
+            if not pairs:
+                continue
+            master_of = {duplicate.id: master.id for master, duplicate in pairs}
+
+            def root(record_id):
+                seen = set()
+                while record_id in master_of and record_id not in seen:
+                    seen.add(record_id)
+                    record_id = master_of[record_id]
+                return record_id
+
+            groups = {}
+            for duplicate_id in master_of:
+                master_id = root(duplicate_id)
+                if master_id != duplicate_id:
+                    groups.setdefault(master_id, []).append(duplicate_id)
+            Model = self.env[res_model].with_context(active_test=False)
+            for master_id, duplicate_ids in groups.items():
+                engine._merge_records(Model.browse(master_id), Model.browse(duplicate_ids))
+        proposals.write({'state': 'merged'})
+        return True
+
+
+class CatalogDedupEngine(models.AbstractModel):
+    _name = 'catalog.dedup.engine'
+    _description = 'Catalog Duplicate Detection Engine'
+
+    # ------------------------------------------------------------------
+    # Candidate generation
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _get_code_column(self, res_model):
+        return 'isrc' if res_model == 'music.recording' else 'iswc'
+
+    @api.model
+    def _get_proposal_fields(self, res_model):
+        if res_model == 'music.recording':
+            return 'master_recording_id', 'duplicate_recording_id'
+        return 'master_work_id', 'duplicate_work_id'
+
+    @api.model
+    def _candidate_pairs(self, res_model, since=None):
+        """Candidate id pairs from three blocking passes, all run in SQL:
+
+        * identical normalized ISRC / ISWC,
+        * identical normalized title key (blocks above DEDUP_MAX_BLOCK_SIZE skipped),
+        * the nearest trigram neighbours of each changed title key.
+
+        With ``since``, only blocks touched by records written after it are
+        examined, so routine runs cost proportional to the catalog changes.
+        """
+        Model = self.env[res_model]
+        Model.flush_model()
+        table = Model._table
+        code = self._get_code_column(res_model)
+        cr = self.env.cr
+        changed = "bool_or(write_date >= %(since)s)" if since else "TRUE"
+        params = {'since': since, 'max_block': DEDUP_MAX_BLOCK_SIZE}
+        pairs = {}
+
+        cr.execute(f"""
+            SELECT array_agg(id ORDER BY id)
+              FROM {table}
+             WHERE active AND {code} IS NOT NULL AND {code} <> ''
+             GROUP BY upper(regexp_replace({code}, '[^0-9A-Za-z]', '', 'g'))
+            HAVING count(*) > 1 AND {changed}
+        """, params)
+        for (ids,) in cr.fetchall():
+            for index, left in enumerate(ids):
+                for right in ids[index + 1:]:
+                    pairs[(left, right)] = 'code'
+
+        cr.execute(f"""
+            SELECT array_agg(id ORDER BY id)
+              FROM {table}
+             WHERE active AND title_key IS NOT NULL AND title_key <> ''
+             GROUP BY title_key
+            HAVING count(*) BETWEEN 2 AND %(max_block)s AND {changed}
+        """, params)
+        for (ids,) in cr.fetchall():
+            for index, left in enumerate(ids):
+                for right in ids[index + 1:]:
+                    pairs.setdefault((left, right), 'title')
+
+        if getattr(self.env.registry, 'has_trigram', False):
+            cr.execute("SET LOCAL pg_trgm.similarity_threshold = %s", [DEDUP_TRIGRAM_THRESHOLD])
+            where_changed = "AND a.write_date >= %(since)s" if since else ""
+            cr.execute(f"""
+                SELECT a.id, n.id
+                  FROM {table} a
+                 CROSS JOIN LATERAL (
+                        SELECT b.id
+                          FROM {table} b
+                         WHERE b.active
+                           AND b.id <> a.id
+                           AND b.title_key %% a.title_key
+                           AND b.title_key <> a.title_key
+                         ORDER BY similarity(b.title_key, a.title_key) DESC
+                         LIMIT %(neighbours)s
+                       ) n
+                 WHERE a.active AND a.title_key <> '' {where_changed}
+            """, dict(params, neighbours=DEDUP_TRIGRAM_NEIGHBOURS))
+            for left, right in cr.fetchall():
+                pairs.setdefault((min(left, right), max(left, right)), 'similar title')
+        return pairs
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _score_pair(self, res_model, left, right, block):
+        """Return (score, reason); 0 when the pair cannot be the same entity."""
+        code = self._get_code_column(res_model)
+        left_code, right_code = normalize_code(left[code]), normalize_code(right[code])
+        if left_code and right_code:
+            if left_code == right_code:
+                return 1.0, _('same %s') % code.upper()
+            # Two different registered codes are two different entities
+            return 0.0, ''
+        title = SequenceMatcher(None, left.title_key, right.title_key).ratio()
+        if res_model == 'music.recording':
+            artists = _overlap(set(left.main_artist_ids.ids), set(right.main_artist_ids.ids))
+            if left.duration_seconds and right.duration_seconds:
+                duration = 1.0 if abs(left.duration_seconds - right.duration_seconds) <= 3 else 0.0
+            else:
+                duration = 0.5
+            score = 0.6 * title + 0.25 * artists + 0.15 * duration
+        else:
+            writers = _overlap(set(left.composer_ids.ids), set(right.composer_ids.ids))
+            score = 0.65 * title + 0.35 * writers
+        return score, block
+
+    @api.model
+    def detect(self, res_model, since=None):
+        """Create merge proposals for ``res_model``; returns the number created."""
+        pairs = self._candidate_pairs(res_model, since)
+        if not pairs:
+            return 0
+        master_field, duplicate_field = self._get_proposal_fields(res_model)
+        Proposal = self.env['catalog.duplicate.proposal']
+        known = set()
+        for proposal in Proposal.search_fetch([('res_model', '=', res_model)], [master_field, duplicate_field]):
+            left, right = proposal[master_field].id, proposal[duplicate_field].id
+            known.add((min(left, right), max(left, right)))
+
+        records = self.env[res_model].browse({record_id for pair in pairs for record_id in pair})
+        fnames = ['title_key', self._get_code_column(res_model)]
+        fnames += ['main_artist_ids', 'duration_seconds'] if res_model == 'music.recording' else ['composer_ids']
+        records.fetch(fnames)
+        by_id = {record.id: record for record in records}
+
+        vals_list = []
+        for (left_id, right_id), block in pairs.items():
+            if (left_id, right_id) in known:
+                continue
+            score, reason = self._score_pair(res_model, by_id[left_id], by_id[right_id], block)
+            if score >= DEDUP_SCORE_THRESHOLD:
+                # The older record is kept by default
+                vals_list.append({
+                    'res_model': res_model,
+                    master_field: left_id,
+                    duplicate_field: right_id,
+                    'score': score,
+                    'reason': reason,
+                })
+        Proposal.create(vals_list)
+        return len(vals_list)
+
+    @api.model
+    def _cron_detect_duplicates(self):
+        """Incremental detection: only blocks touched since the previous run are re-examined."""
+        params = self.env['ir.config_parameter'].sudo()
+        since = params.get_param('label_studio_publishing.dedup_last_run') or None
+        started = fields.Datetime.to_string(fields.Datetime.now())
+        created = self.detect('music.recording', since) + self.detect('music.work', since)
+        params.set_param('label_studio_publishing.dedup_last_run', started)
+        _logger.info('Catalog duplicate detection created %s proposals', created)
+
+    # ------------------------------------------------------------------
+    # Merging
+    # ------------------------------------------------------------------
+
+    @api.model
+    def _get_referencing_fields(self, res_model):
+        """Stored many2one / many2many fields, on any model, pointing to ``res_model``."""
+        references = []
+        for model_name, Model in self.env.registry.items():
+            if Model._abstract or Model._transient or not Model._auto or model_name == 'catalog.duplicate.proposal':
+                continue
+            for field in Model._fields.values():
+                if (field.type in ('many2one', 'many2many') and field.comodel_name == res_model
+                        and field.store and not field.compute and not field.related):
+                    references.append((model_name, field.name, field.type))
+        return references
+
+    @api.model
+    def _merge_records(self, master, duplicates):
+        """Re-point every reference to ``duplicates`` onto ``master`` and archive them.
+
+        Each referencing field is updated with a single search and write over
+        all duplicates, so usage lines, splits, licenses and release tracklists
+        move in bulk.
+        """
+        duplicates = duplicates - master
+        if not duplicates:
+            return
+        for model_name, field_name, field_type in self._get_referencing_fields(master._name):
+            records = self.env[model_name].with_context(active_test=False).search(
+                [(field_name, 'in', duplicates.ids)]
+            )
+            if not records:
+                continue
+            if field_type == 'many2many':
+                records.write({field_name: [(3, duplicate_id) for duplicate_id in duplicates.ids] + [(4, master.id)]})
+                continue
+            if model_name == 'publ.split' and master.split_ids:
+                # The master already carries a split sheet; keep the duplicate's rows only as history
+                records.write({'active': False})
+            records.write({field_name: master.id})
+
+        code = self._get_code_column(master._name)
+        if not master[code]:
+            donor = duplicates.filtered(code)[:1]
+            if donor:
+                master[code] = donor[code]
+        duplicates.write({'active': False})
+        master._message_log(body=_('Merged duplicates: %s') % ', '.join(duplicates.mapped('display_name')))
+        # Open proposals about the archived records are now moot
+        master_field, duplicate_field = self._get_proposal_fields(master._name)
+        self.env['catalog.duplicate.proposal'].search([
+            ('state', '=', 'proposed'),
+            '|', (master_field, 'in', duplicates.ids), (duplicate_field, 'in', duplicates.ids),
+        ]).write({'state': 'dismissed'})
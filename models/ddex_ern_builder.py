@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+
+import mimetypes
+
+from lxml import etree
+from lxml.builder import E
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+ERN_NAMESPACE = 'http://ddex.net/xml/ern/43'
+ERN_AVS_VERSION = '4'
+ERN_RELEASE_PROFILE = 'Audio'
+# Releases whose records are prefetched and written together before the cache is dropped
+DDEX_BATCH_SIZE = 50
+
+DDEX_RELEASE_TYPES = {
+    'single': 'Single',
+    'ep': 'EP',
+    'album': 'Album',
+    'compilation': 'Album',
+    'soundtrack': 'Album',
+    'remix_album': 'Album',
+    'live_album': 'Album',
+}
+
+
+def _iso_duration(seconds):
+    """ISO 8601 duration (PT#M#S) as used by DDEX."""
+    minutes, seconds = divmod(int(seconds or 0), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"PT{hours}H{minutes}M{seconds}S" if hours else f"PT{minutes}M{seconds}S"
+
+
+def _display_title(title, subtitle=None):
+    element = E.DisplayTitle(E.TitleText(title or ''))
+    if subtitle:
+        element.append(E.SubTitle(subtitle))
+    return element
+
+
+class DdexErnBuilder(models.AbstractModel):
+    _name = 'ddex.ern.builder'
+    _description = 'DDEX ERN Message Builder'
+
+    @api.model
+    def _get_sender(self):
+        params = self.env['ir.config_parameter'].sudo()
+        party_id = params.get_param('label_studio_publishing.ddex_party_id')
+        if not party_id:
+            raise UserError(_('Configure your DDEX Party ID in the settings before generating packages.'))
+        thread_prefix = params.get_param('label_studio_publishing.ddex_message_thread_id') or 'LSP'
+        return {
+            'party_id': party_id,
+            'name': self.env.company.name,
+            'thread_prefix': thread_prefix,
+        }
+
+    @api.model
+    def _prefetch(self, releases):
+        """Load everything the messages of ``releases`` need in a handful of queries.
+
+        Returns the cover artwork attachments indexed by release id; their
+        binary content is only read when the file is written to the package.
+        """
+        releases.fetch([
+            'title', 'release_type', 'catalog_number', 'upc', 'grid', 'release_date',
+            'original_release_date', 'main_artist_ids', 'various_artists', 'label_id',
+            'distributor_id', 'recording_ids', 'genre_ids', 'parental_advisory',
+            'p_line', 'c_line', 'total_duration',
+        ])
+        recordings = releases.recording_ids
+        recordings.fetch([
+            'title', 'version', 'isrc', 'internal_recording_id', 'main_artist_ids',
+            'featured_artist_ids', 'producer_ids', 'duration_seconds', 'parental_advisory',
+            'p_line', 'genre_ids', 'work_id',
+        ])
+        recordings.work_id.fetch(['title', 'iswc', 'composer_ids'])
+        partners = (
+            releases.main_artist_ids | releases.label_id | releases.distributor_id
+            | recordings.main_artist_ids | recordings.featured_artist_ids
+            | recordings.producer_ids | recordings.work_id.composer_ids
+        )
+        partners.fetch(['name'])
+        (releases.genre_ids | recordings.genre_ids).fetch(['name'])
+        attachments = self.env['ir.attachment'].sudo().search_fetch(
+            [
+                ('res_model', '=', 'music.release'),
+                ('res_field', '=', 'cover_artwork'),
+                ('res_id', 'in', releases.ids),
+            ],
+            ['res_id', 'mimetype', 'file_size', 'checksum'],
+        )
+        return {attachment.res_id: attachment for attachment in attachments}
+
+    @api.model
+    def _get_artwork_filename(self, release, attachment):
+        extension = mimetypes.guess_extension(attachment.mimetype or '') or '.jpg'
+        return f"resources/{release.catalog_number}_cover{extension}"
+
+    @api.model
+    def write_message(self, target, release, sender, artwork=None, recipient=None,
+                      control_type='LiveMessage'):
+        """Stream the NewReleaseMessage of ``release`` to the file object ``target``.
+
+        The message is written section by section with ``etree.xmlfile``; only
+        one resource or release element exists in memory at a time.
+        """
+        parties = {}
+
+        def party_ref(partner):
+            if partner.id not in parties:
+                parties[partner.id] = (f"P{len(parties) + 1}", partner)
+            return parties[partner.id][0]
+
+        release_artists = release.main_artist_ids
+        for partner in release_artists | release.label_id:
+            party_ref(partner)
+        for recording in release.recording_ids:
+            for partner in (recording.main_artist_ids | recording.featured_artist_ids
+                            | recording.producer_ids | recording.work_id.composer_ids):
+                party_ref(partner)
+
+        now = fields.Datetime.now()
+        thread_id = f"{sender['thread_prefix']}-{release.catalog_number}"
+        with etree.xmlfile(target, encoding='utf-8') as xf:
+            xf.write_declaration()
+            nsmap = {'ern': ERN_NAMESPACE}
+            with xf.element(etree.QName(ERN_NAMESPACE, 'NewReleaseMessage'), nsmap=nsmap, attrib={
+                'AvsVersionId': ERN_AVS_VERSION,
+                'ReleaseProfileVersionId': ERN_RELEASE_PROFILE,
+                'LanguageAndScriptCode': 'en',
+            }):
+                xf.write(self._build_header(release, sender, recipient, thread_id, now, control_type))
+                xf.write(E.PartyList(*(
+                    E.Party(E.PartyReference(reference), E.PartyName(E.FullName(partner.name or '')))
+                    for reference, partner in parties.values()
+                )))
+
+                resource_refs = []
+                with xf.element('ResourceList'):
+                    for sequence, recording in enumerate(release.recording_ids, start=1):
+                        reference = f"A{sequence}"
+                        resource_refs.append(reference)
+                        xf.write(self._build_sound_recording(recording, reference, party_ref))
+                    image_ref = False
+                    if artwork:
+                        image_ref = f"A{len(resource_refs) + 1}"
+                        xf.write(self._build_image(release, artwork, image_ref, sender))
+                    xf.flush()
+
+                with xf.element('ReleaseList'):
+                    xf.write(self._build_release(release, resource_refs, image_ref, party_ref))
+
+    @api.model
+    def _build_header(self, release, sender, recipient, thread_id, now, control_type):
+        recipient = recipient or {}
+        recipient_name = recipient.get('name') or release.distributor_id.name or ''
+        recipient_element = E.MessageRecipient(E.PartyName(E.FullName(recipient_name)))
+        if recipient.get('party_id'):
+            recipient_element.insert(0, E.PartyId(recipient['party_id']))
+        return E.MessageHeader(
+            E.MessageThreadId(thread_id),
+            E.MessageId(f"{thread_id}-{now.strftime('%Y%m%d%H%M%S')}"),
+            E.MessageSender(E.PartyId(sender['party_id']), E.PartyName(E.FullName(sender['name'] or ''))),
+            recipient_element,
+            E.MessageCreatedDateTime(now.strftime('%Y-%m-%dT%H:%M:%SZ')),
+            E.MessageControlType(control_type),
+        )
+
+    @api.model
+    def _build_display_artists(self, main_artists, featured_artists, party_ref):
+        elements = []
+        sequence = 1
+        for partners, role in ((main_artists, 'MainArtist'), (featured_artists, 'FeaturedArtist')):
+            for partner in partners:
+                elements.append(E.DisplayArtist(
+                    E.ArtistPartyReference(party_ref(partner)),
+                    E.DisplayArtistRole(role),
+                    SequenceNumber=str(sequence),
+                ))
+                sequence += 1
+        return elements
+
+    @api.model
+    def _build_sound_recording(self, recording, reference, party_ref):
+        artist_name = ', '.join(recording.main_artist_ids.mapped('name'))
+        if recording.featured_artist_ids:
+            artist_name = f"{artist_name} feat. {', '.join(recording.featured_artist_ids.mapped('name'))}"
+        edition = E.SoundRecordingEdition(E.ResourceId(E.ISRC(recording.isrc.replace('-', ''))))
+        if recording.p_line:
+            edition.append(E.PLine(E.PLineText(recording.p_line)))
+        element = E.SoundRecording(
+            E.ResourceReference(reference),
+            E.Type('MusicalWorkSoundRecording'),
+            edition,
+            E.DisplayTitleText(recording.title or ''),
+            _display_title(recording.title, recording.version),
+            E.DisplayArtistName(artist_name),
+            *self._build_display_artists(recording.main_artist_ids, recording.featured_artist_ids, party_ref),
+        )
+        sequence = 1
+        for partners, role in ((recording.producer_ids, 'Producer'),
+                               (recording.work_id.composer_ids, 'Composer')):
+            for partner in partners:
+                element.append(E.Contributor(
+                    E.ContributorPartyReference(party_ref(partner)),
+                    E.Role(role),
+                    SequenceNumber=str(sequence),
+                ))
+                sequence += 1
+        element.append(E.Duration(_iso_duration(recording.duration_seconds)))
+        element.append(E.ParentalWarningType('Explicit' if recording.parental_advisory else 'NotExplicit'))
+        return element
+
+    @api.model
+    def _build_image(self, release, artwork, reference, sender):
+        return E.Image(
+            E.ResourceReference(reference),
+            E.Type('FrontCoverImage'),
+            E.ResourceId(E.ProprietaryId(release.catalog_number, Namespace=f"DPID:{sender['party_id']}")),
+            E.TechnicalDetails(
+                E.TechnicalResourceDetailsReference(f"T{reference}"),
+                E.File(
+                    E.URI(self._get_artwork_filename(release, artwork)),
+                    E.HashSum(E.Algorithm('SHA1'), E.HashSumValue(artwork.checksum or '')),
+                ),
+            ),
+        )
+
+    @api.model
+    def _build_release(self, release, resource_refs, image_ref, party_ref):
+        if release.various_artists:
+            artist_name = _('Various Artists')
+        else:
+            artist_name = ', '.join(release.main_artist_ids.mapped('name'))
+        release_id = E.ReleaseId()
+        if release.upc:
+            release_id.append(E.ICPN(release.upc))
+        if release.grid:
+            release_id.append(E.GRid(release.grid))
+        release_id.append(E.CatalogNumber(release.catalog_number, Namespace='DPID'))
+        element = E.Release(
+            E.ReleaseReference('R0'),
+            E.ReleaseType(DDEX_RELEASE_TYPES.get(release.release_type, 'Album')),
+            release_id,
+            E.DisplayTitleText(release.title or ''),
+            _display_title(release.title),
+            E.DisplayArtistName(artist_name),
+            *self._build_display_artists(release.main_artist_ids, self.env['res.partner'], party_ref),
+        )
+        if release.label_id:
+            element.append(E.ReleaseLabelReference(party_ref(release.label_id)))
+        element.append(E.Duration(_iso_duration(release.total_duration)))
+        if release.p_line:
+            element.append(E.PLine(E.PLineText(release.p_line)))
+        if release.c_line:
+            element.append(E.CLine(E.CLineText(release.c_line)))
+        for genre in release.genre_ids:
+            element.append(E.Genre(E.GenreText(genre.name)))
+        if release.original_release_date:
+            element.append(E.OriginalReleaseDate(fields.Date.to_string(release.original_release_date)))
+        element.append(E.ParentalWarningType('Explicit' if release.parental_advisory else 'NotExplicit'))
+        group = E.ResourceGroup()
+        for sequence, reference in enumerate(resource_refs, start=1):
+            group.append(E.ResourceGroupContentItem(
+                E.SequenceNumber(str(sequence)),
+                E.ReleaseResourceReference(reference),
+            ))
+        if image_ref:
+            group.append(E.LinkedReleaseResourceReference(image_ref, LinkDescription='FrontCoverImage'))
+        element.append(group)
+        return element
+
+    @api.model
+    def write_packages(self, zip_file, releases, recipient=None, control_type='LiveMessage',
+                       include_artwork=True):
+        """Write one ERN package per release into the open ``zipfile.ZipFile``.
+
+        Releases are processed in batches: each batch is prefetched at once,
+        streamed into the archive, then evicted from the cache so memory stays
+        flat on full catalog re-deliveries.
+        """
+        sender = self._get_sender()
+        not_ready = releases.filtered(lambda release: not release.ddex_ready)
+        if not_ready:
+            raise UserError(_('These releases are not ready for DDEX delivery:\n%s')
+                            % '\n'.join(not_ready.mapped('display_name')))
+        release_ids = releases.ids
+        for start in range(0, len(release_ids), DDEX_BATCH_SIZE):
+            batch = releases.browse(release_ids[start:start + DDEX_BATCH_SIZE])
+            artwork_by_release = self._prefetch(batch)
+            for release in batch:
+                folder = release.catalog_number
+                artwork = artwork_by_release.get(release.id) if include_artwork else None
+                with zip_file.open(f"{folder}/{folder}.xml", 'w') as target:
+                    self.write_message(target, release, sender, artwork, recipient, control_type)
+                if artwork:
+                    zip_file.writestr(f"{folder}/{self._get_artwork_filename(release, artwork)}", artwork.raw)
+            self.env.invalidate_all()
@@ -1,9 +1,14 @@
 # -*- coding: utf-8 -*-
 
 from odoo import models, fields, api, _
-from odoo.exceptions import ValidationError
+from odoo.exceptions import UserError, ValidationError
 import re
 
+from .catalog_dedup import normalize_recording_title
+
+# The ISRC designation code is five digits, counted per registrant and year
+ISRC_MAX_DESIGNATION = 99999
+
 
 class MusicRecording(models.Model):
     _name = 'music.recording'
@@ -20,6 +25,15 @@ class MusicRecording(models.Model):
                        index=True)
     internal_recording_id = fields.Char(string='Internal Recording ID', required=True, copy=False,
                                        default=lambda self: _('New'))
+    search_text = fields.Char(string='Search Text', compute='_compute_search_text', store=True,
+                              index='trigram', copy=False,
+                              help='Title, version, codes and artist names, used by autocomplete')
+    title_key = fields.Char(string='Title Key', compute='_compute_title_key', store=True,
+                            index='trigram', copy=False,
+                            help='Normalized title used to detect duplicate recordings')
+    rematch_pending = fields.Boolean(string='Usage Re-match Pending', copy=False, readonly=True, index=True,
+                                     help='Set when the ISRC, title or artists change so unmatched '
+                                          'usage lines are matched against this recording')
     
     # Associated Work
     work_id = fields.Many2one('music.work', string='Associated Work', index=True)
@@ -122,11 +136,54 @@ class MusicRecording(models.Model):
         ('archived', 'Archived')
     ], string='Status', default='draft', tracking=True)
     
-    @api.model
-    def create(self, vals):
-        if vals.get('internal_recording_id', _('New')) == _('New'):
-            vals['internal_recording_id'] = self.env['ir.sequence'].next_by_code('music.recording') or _('New')
-        return super().create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get('internal_recording_id', _('New')) == _('New'):
+                vals['internal_recording_id'] = self.env['ir.sequence'].next_by_code('music.recording') or _('New')
+        recordings = super().create(vals_list)
+        recordings._schedule_usage_rematch()
+        return recordings
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'main_artist_ids' in vals or 'featured_artist_ids' in vals:
+            self.env['royalty.usage.partner.rel']._refresh_index('recording_id', self.ids)
+        if {'isrc', 'title', 'main_artist_ids', 'active'} & set(vals):
+            self._schedule_usage_rematch()
+        return res
+
+    def unlink(self):
+        # Matched usage lines are unlinked from the record by ON DELETE SET NULL,
+        # which the ownership index does not see; rebuild their rows afterwards
+        lines = self.env['royalty.usage.line'].search([('recording_id', 'in', self.ids)])
+        res = super().unlink()
+        self.env['royalty.usage.partner.rel']._refresh_index('id', lines.ids)
+        return res
+
+    def _schedule_usage_rematch(self):
+        """Queue these recordings for matching against unmatched usage lines."""
+        if not self or self.env.context.get('skip_usage_rematch'):
+            return
+        self.write({'rematch_pending': True})
+        self.env['royalty.usage.line']._trigger_rematch()
+
+    @api.depends('title', 'version', 'isrc', 'internal_recording_id',
+                 'main_artist_ids.name', 'featured_artist_ids.name')
+    def _compute_search_text(self):
+        for recording in self:
+            parts = [recording.title, recording.version, recording.isrc, recording.internal_recording_id]
+            if recording.isrc:
+                # Let people paste the code with or without hyphens
+                parts.append(recording.isrc.replace('-', ''))
+            parts += recording.main_artist_ids.mapped('name')
+            parts += recording.featured_artist_ids.mapped('name')
+            recording.search_text = ' '.join(part for part in parts if part)
+
+    @api.depends('title')
+    def _compute_title_key(self):
+        for recording in self:
+            recording.title_key = normalize_recording_title(recording.title)
 
     @api.depends('duration_seconds')
     def _compute_duration_display(self):
@@ -152,6 +209,9 @@ class MusicRecording(models.Model):
     @api.constrains('isrc')
     def _check_isrc_format(self):
         """Validate ISRC format"""
+        if self.env.context.get('skip_catalog_code_checks'):
+            # Bulk loaders validate and normalize the codes for the whole batch up front
+            return
         for recording in self:
             if recording.isrc:
                 # ISRC format: CC-XXX-YY-NNNNN
@@ -209,28 +269,34 @@ class MusicRecording(models.Model):
             'domain': [('id', 'in', self.studio_session_ids.ids)],
         }
 
-    def name_get(self):
-        """Custom name display"""
-        result = []
+    @api.depends('title', 'version', 'isrc', 'main_artist_ids.name')
+    def _compute_display_name(self):
+        # Read the whole page in two queries instead of one artist lookup per row
+        self.filtered('id').fetch(['title', 'version', 'isrc', 'main_artist_ids'])
+        artist_names = {artist.id: artist.name for artist in self.main_artist_ids}
         for recording in self:
             name = recording.title
             if recording.version:
                 name = f"{name} ({recording.version})"
             # Add main artists
-            if recording.main_artist_ids:
-                artists = ', '.join(recording.main_artist_ids.mapped('name')[:2])
-                if len(recording.main_artist_ids) > 2:
-                    artists += f" +{len(recording.main_artist_ids) - 2} more"
+            artist_ids = recording.main_artist_ids._ids
+            if artist_ids:
+                artists = ', '.join(artist_names[artist_id] for artist_id in artist_ids[:2])
+                if len(artist_ids) > 2:
+                    artists += f" +{len(artist_ids) - 2} more"
                 name = f"{artists} - {name}"
             if recording.isrc:
                 name = f"{name} [{recording.isrc}]"
-            result.append((recording.id, name))
-        return result
+            recording.display_name = name
 
     @api.model
     def name_search(self, name='', args=None, operator='ilike', limit=100):
         """Enhanced search including ISRC and artist names"""
         args = args or []
+        if name and operator == 'ilike':
+            # Single lookup on the trigram-indexed search text
+            records = self.search([('search_text', 'ilike', name)] + args, limit=limit)
+            return [(record.id, record.display_name) for record in records]
         if name:
             domain = [
                 '|', '|', '|', '|',
@@ -240,7 +306,8 @@ class MusicRecording(models.Model):
                 ('main_artist_ids.name', operator, name),
                 ('featured_artist_ids.name', operator, name)
             ]
-            return self.search(domain + args, limit=limit).name_get()
+            records = self.search(domain + args, limit=limit)
+            return [(record.id, record.display_name) for record in records]
         return super().name_search(name, args, operator, limit)
 
     def copy(self, default=None):
@@ -255,22 +322,38 @@ class MusicRecording(models.Model):
 
     def action_generate_isrc(self):
         """Generate ISRC if not set"""
-        if not self.isrc:
-            # This would integrate with an ISRC agency or generate based on label prefix
-            # For now, create a placeholder
-            country_code = self.env.company.country_id.code or 'US'
-            registrant_code = 'ABC'  # This should come from configuration
-            year_code = str(fields.Date.today().year)[-2:]
-            
-            # Get next sequence number for this year
-            existing_count = self.search_count([
-                ('isrc', 'like', f'{country_code}-{registrant_code}-{year_code}-%')
-            ])
-            designation = f"{existing_count + 1:05d}"
-            
-            self.isrc = f"{country_code}-{registrant_code}-{year_code}-{designation}"
-            
-            self.message_post(body=f"ISRC generated: {self.isrc}")
+        self._allocate_isrc()
+
+    def _get_isrc_prefix(self):
+        """Country and registrant codes used for newly allocated ISRCs"""
+        country_code = (self.env.company.country_id.code or '').upper()
+        registrant_code = (self.env['ir.config_parameter'].sudo().get_param(
+            'label_studio_publishing.isrc_registrant_code') or '').strip().upper()
+        if not country_code:
+            raise UserError(_('Set a country on the company before generating ISRCs.'))
+        if not re.match(r'^[A-Z0-9]{3}$', registrant_code):
+            raise UserError(_('Configure a 3-character ISRC registrant code in the settings.'))
+        return country_code, registrant_code
+
+    def _allocate_isrc(self):
+        """Assign consecutive ISRCs to the recordings without one, in recordset order.
+
+        The designation codes are reserved with a single row-locked counter update,
+        so concurrent allocations never hand out the same code and a rolled back
+        transaction gives its codes back.
+        """
+        recordings = self.filtered(lambda recording: not recording.isrc)
+        if not recordings:
+            return recordings
+        country_code, registrant_code = self._get_isrc_prefix()
+        year_code = fields.Date.context_today(self).strftime('%y')
+        first = self.env['music.isrc.counter']._reserve(country_code, registrant_code, year_code, len(recordings))
+        for designation, recording in enumerate(recordings, start=first):
+            recording.isrc = f"{country_code}-{registrant_code}-{year_code}-{designation:05d}"
+        recordings._message_log_batch(
+            bodies={recording.id: _('ISRC generated: %s') % recording.isrc for recording in recordings}
+        )
+        return recordings
 
     def action_update_sales_data(self):
         """Update sales data from royalty statements"""
@@ -287,4 +370,57 @@ class MusicRecording(models.Model):
             'total_streams': streams,
             'total_downloads': downloads,
             'total_physical_sales': physical,
-        })
\ No newline at end of file
+        })
+
+class MusicIsrcCounter(models.Model):
+    _name = 'music.isrc.counter'
+    _description = 'ISRC Designation Counter'
+    _log_access = False
+
+    country_code = fields.Char(string='Country Code', size=2, required=True)
+    registrant_code = fields.Char(string='Registrant Code', size=3, required=True)
+    year = fields.Char(string='Year', size=2, required=True)
+    last_number = fields.Integer(string='Last Designation', default=0)
+
+    # Also the ON CONFLICT target of _reserve
+    _prefix_year_uniq = models.Constraint(
+        'unique(country_code, registrant_code, year)',
+        'There is already an ISRC counter for this registrant and year.',
+    )
+
+    @api.model
+    def _reserve(self, country_code, registrant_code, year, count):
+        """Reserve ``count`` consecutive designations and return the first one."""
+        self.env['music.recording'].flush_model(['isrc'])
+        # A new counter starts after the highest code already in the catalog
+        self.env.cr.execute(
+            """
+            INSERT INTO music_isrc_counter (country_code, registrant_code, year, last_number)
+            SELECT %(country)s, %(registrant)s, %(year)s,
+                   COALESCE(MAX(CAST(RIGHT(isrc, 5) AS INTEGER)), 0)
+              FROM music_recording
+             WHERE isrc LIKE %(pattern)s
+            ON CONFLICT (country_code, registrant_code, year) DO NOTHING
+            """,
+            {
+                'country': country_code,
+                'registrant': registrant_code,
+                'year': year,
+                'pattern': f'{country_code}-{registrant_code}-{year}-%',
+            },
+        )
+        self.env.cr.execute(
+            """
+            UPDATE music_isrc_counter
+               SET last_number = last_number + %s
+             WHERE country_code = %s AND registrant_code = %s AND year = %s
+         RETURNING last_number
+            """,
+            [count, country_code, registrant_code, year],
+        )
+        last_number = self.env.cr.fetchone()[0]
+        self.invalidate_model(['last_number'])
+        if last_number > ISRC_MAX_DESIGNATION:
+            raise UserError(_('No ISRC designation codes are left for %s-%s-%s.')
+                            % (country_code, registrant_code, year))
+        return last_number - count + 1
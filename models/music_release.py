@@ -115,11 +115,12 @@ class MusicRelease(models.Model):
     
     active = fields.Boolean(string='Active', default=True)
     
-    @api.model
-    def create(self, vals):
-        if vals.get('catalog_number', _('New')) == _('New'):
-            vals['catalog_number'] = self.env['ir.sequence'].next_by_code('music.release') or _('New')
-        return super().create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get('catalog_number', _('New')) == _('New'):
+                vals['catalog_number'] = self.env['ir.sequence'].next_by_code('music.release') or _('New')
+        return super().create(vals_list)
 
     @api.depends('recording_ids')
     def _compute_track_count(self):
@@ -173,6 +174,9 @@ class MusicRelease(models.Model):
     @api.constrains('upc')
     def _check_upc_format(self):
         """Validate UPC/EAN format"""
+        if self.env.context.get('skip_catalog_code_checks'):
+            # Bulk loaders validate and normalize the codes for the whole batch up front
+            return
         for release in self:
             if release.upc:
                 # Remove spaces and hyphens
@@ -212,7 +216,7 @@ class MusicRelease(models.Model):
 
     def action_generate_ddex_package(self):
         """Generate DDEX ERN package"""
-        if not self.ddex_ready:
+        if not all(self.mapped('ddex_ready')):
             raise ValidationError(_('Release is not ready for DDEX delivery. Please complete metadata and ensure all recordings have ISRCs.'))
         
         return {
@@ -221,7 +225,7 @@ class MusicRelease(models.Model):
             'res_model': 'ddex.export.wizard',
             'view_mode': 'form',
             'target': 'new',
-            'context': {'default_release_id': self.id},
+            'context': {'default_release_ids': [(6, 0, self.ids)]},
         }
 
     def action_approve_release(self):
@@ -245,20 +249,26 @@ class MusicRelease(models.Model):
         # Update recordings status
         self.recording_ids.write({'status': 'released'})
 
-    def name_get(self):
-        """Custom name display"""
-        result = []
+    def action_generate_isrcs(self):
+        """Assign ISRCs to the whole tracklist in one allocation"""
+        for release in self:
+            release.recording_ids._allocate_isrc()
+
+    @api.depends('title', 'catalog_number', 'various_artists', 'main_artist_ids.name')
+    def _compute_display_name(self):
+        self.filtered('id').fetch(['title', 'catalog_number', 'various_artists', 'main_artist_ids'])
+        artist_names = {artist.id: artist.name for artist in self.main_artist_ids}
         for release in self:
             name = release.title
-            if release.main_artist_ids and not release.various_artists:
-                artists = ', '.join(release.main_artist_ids.mapped('name')[:2])
-                if len(release.main_artist_ids) > 2:
-                    artists += f" +{len(release.main_artist_ids) - 2} more"
+            artist_ids = release.main_artist_ids._ids
+            if artist_ids and not release.various_artists:
+                artists = ', '.join(artist_names[artist_id] for artist_id in artist_ids[:2])
+                if len(artist_ids) > 2:
+                    artists += f" +{len(artist_ids) - 2} more"
                 name = f"{artists} - {name}"
             if release.catalog_number:
                 name = f"{name} [{release.catalog_number}]"
-            result.append((release.id, name))
-        return result
+            release.display_name = name
 
     @api.model
     def name_search(self, name='', args=None, operator='ilike', limit=100):
@@ -272,7 +282,8 @@ class MusicRelease(models.Model):
                 ('upc', operator, name),
                 ('main_artist_ids.name', operator, name)
             ]
-            return self.search(domain + args, limit=limit).name_get()
+            records = self.search(domain + args, limit=limit)
+            return [(record.id, record.display_name) for record in records]
         return super().name_search(name, args, operator, limit)
 
     def copy(self, default=None):
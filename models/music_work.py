@@ -4,6 +4,8 @@ from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
 import re
 
+from .catalog_dedup import normalize_work_title
+
 
 class MusicGenre(models.Model):
     _name = 'music.genre'
@@ -34,6 +36,15 @@ class MusicWork(models.Model):
                        index=True)
     internal_work_id = fields.Char(string='Internal Work ID', required=True, copy=False,
                                   default=lambda self: _('New'))
+    search_text = fields.Char(string='Search Text', compute='_compute_search_text', store=True,
+                              index='trigram', copy=False,
+                              help='Titles, codes and writer names, used by autocomplete')
+    title_key = fields.Char(string='Title Key', compute='_compute_title_key', store=True,
+                            index='trigram', copy=False,
+                            help='Normalized title used to detect duplicate works')
+    rematch_pending = fields.Boolean(string='Usage Re-match Pending', copy=False, readonly=True, index=True,
+                                     help='Set when the ISWC changes so unmatched usage lines '
+                                          'are matched against this work')
     
     # Creation Details
     original_pub_date = fields.Date(string='Original Publication Date')
@@ -113,11 +124,53 @@ class MusicWork(models.Model):
         ('archived', 'Archived')
     ], string='Status', default='draft', tracking=True)
 
-    @api.model
-    def create(self, vals):
-        if vals.get('internal_work_id', _('New')) == _('New'):
-            vals['internal_work_id'] = self.env['ir.sequence'].next_by_code('music.work') or _('New')
-        return super().create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get('internal_work_id', _('New')) == _('New'):
+                vals['internal_work_id'] = self.env['ir.sequence'].next_by_code('music.work') or _('New')
+        works = super().create(vals_list)
+        works.filtered('iswc')._schedule_usage_rematch()
+        return works
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'composer_ids' in vals:
+            self.env['royalty.usage.partner.rel']._refresh_index('work_id', self.ids)
+        if {'iswc', 'active'} & set(vals):
+            self.filtered('iswc')._schedule_usage_rematch()
+        return res
+
+    def unlink(self):
+        # Matched usage lines are unlinked from the record by ON DELETE SET NULL,
+        # which the ownership index does not see; rebuild their rows afterwards
+        lines = self.env['royalty.usage.line'].search([('work_id', 'in', self.ids)])
+        res = super().unlink()
+        self.env['royalty.usage.partner.rel']._refresh_index('id', lines.ids)
+        return res
+
+    def _schedule_usage_rematch(self):
+        """Queue these works for matching against unmatched usage lines."""
+        if not self or self.env.context.get('skip_usage_rematch'):
+            return
+        self.write({'rematch_pending': True})
+        self.env['royalty.usage.line']._trigger_rematch()
+
+    @api.depends('title', 'subtitle', 'alternate_titles', 'iswc', 'internal_work_id', 'composer_ids.name')
+    def _compute_search_text(self):
+        for work in self:
+            parts = [work.title, work.subtitle, work.iswc, work.internal_work_id]
+            if work.iswc:
+                # ISWCs are often typed without the separators
+                parts.append(re.sub(r'[^0-9A-Za-z]', '', work.iswc))
+            parts += (work.alternate_titles or '').splitlines()
+            parts += work.composer_ids.mapped('name')
+            work.search_text = ' '.join(part.strip() for part in parts if part and part.strip())
+
+    @api.depends('title')
+    def _compute_title_key(self):
+        for work in self:
+            work.title_key = normalize_work_title(work.title)
 
     @api.depends('duration_seconds')
     def _compute_duration_display(self):
@@ -154,6 +207,9 @@ class MusicWork(models.Model):
     @api.constrains('iswc')
     def _check_iswc_format(self):
         """Validate ISWC format"""
+        if self.env.context.get('skip_catalog_code_checks'):
+            # Bulk loaders validate the codes for the whole batch up front
+            return
         for work in self:
             if work.iswc:
                 # ISWC format: T-123456789-1 or T1234567890
@@ -202,22 +258,25 @@ class MusicWork(models.Model):
             'context': {'default_work_id': self.id},
         }
 
-    def name_get(self):
-        """Custom name display"""
-        result = []
+    @api.depends('title', 'subtitle', 'iswc')
+    def _compute_display_name(self):
+        self.filtered('id').fetch(['title', 'subtitle', 'iswc'])
         for work in self:
             name = work.title
             if work.subtitle:
                 name = f"{name} ({work.subtitle})"
             if work.iswc:
                 name = f"{name} [{work.iswc}]"
-            result.append((work.id, name))
-        return result
+            work.display_name = name
 
     @api.model
     def name_search(self, name='', args=None, operator='ilike', limit=100):
         """Enhanced search including ISWC and alternate titles"""
         args = args or []
+        if name and operator == 'ilike':
+            # Single lookup on the trigram-indexed search text
+            records = self.search([('search_text', 'ilike', name)] + args, limit=limit)
+            return [(record.id, record.display_name) for record in records]
         if name:
             domain = [
                 '|', '|', '|',
@@ -226,7 +285,8 @@ class MusicWork(models.Model):
                 ('internal_work_id', operator, name),
                 ('alternate_titles', operator, name)
             ]
-            return self.search(domain + args, limit=limit).name_get()
+            records = self.search(domain + args, limit=limit)
+            return [(record.id, record.display_name) for record in records]
         return super().name_search(name, args, operator, limit)
 
     def copy(self, default=None):
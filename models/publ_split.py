@@ -2,6 +2,38 @@
 
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from odoo.tools import float_round
+
+# Default portion of a work's net income paid as publisher share, the rest being
+# the writer share; overridden by the publisher_share_percentage setting
+PUBLISHER_PORTION = 0.5
+
+# Parallel columns returned per work by publ.split.resolver._load_splits
+SPLIT_COLUMNS = ('split_ids', 'contributor_ids', 'payee_ids', 'roles',
+                 'writer_shares', 'publisher_shares', 'controlled')
+
+
+def allocate_largest_remainder(amount, weights, precision_rounding):
+    """Split ``amount`` by ``weights`` (fractions of the whole) into rounded parts.
+
+    Every part is floored to ``precision_rounding`` and the rounding residual is
+    handed out one unit at a time to the parts with the largest remainders, so
+    the parts always add up to ``amount * sum(weights)`` rounded once.
+    """
+    if not weights:
+        return []
+    sign = -1 if amount < 0 else 1
+    total_units = round(abs(amount) / precision_rounding)
+    target = round(total_units * sum(weights))
+    raw = [total_units * weight for weight in weights]
+    units = [int(value) for value in raw]
+    residual = target - sum(units)
+    if residual > 0:
+        by_remainder = sorted(range(len(raw)), key=lambda i: units[i] - raw[i])
+        for i in by_remainder[:residual]:
+            units[i] += 1
+    return [float_round(sign * unit * precision_rounding, precision_rounding=precision_rounding)
+            for unit in units]
 
 
 class PublSplit(models.Model):
@@ -49,4 +81,134 @@ class PublSplit(models.Model):
             if split.publisher_share > 0:
                 name += f" (Publisher: {split.publisher_share}%)"
             result.append((split.id, name))
-        return result
\ No newline at end of file
+        return result
+
+
+class PublSplitResolver(models.AbstractModel):
+    """Resolve publishing splits for many works at once.
+
+    Loads the active splits of every work involved with a single query and
+    allocates net amounts per work rather than per usage line. Used by the
+    royalty statement report to print the publishing shares of a statement.
+    """
+    _name = 'publ.split.resolver'
+    _description = 'Publishing Split Resolver'
+
+    @api.model
+    def _load_splits(self, work_ids, controlled_only=False):
+        """Return ``{work_id: {column: [...]}}`` for the active splits of ``work_ids``.
+
+        Columns are listed in ``SPLIT_COLUMNS``. ``payee_ids`` holds the admin
+        entity collecting on behalf of the contributor when one is set.
+        """
+        work_ids = list({work_id for work_id in work_ids if work_id})
+        if not work_ids:
+            return {}
+        self.env['publ.split'].flush_model([
+            'work_id', 'sequence', 'contributor_id', 'role', 'writer_share',
+            'publisher_share', 'controlled', 'admin_entity_id', 'active',
+        ])
+        query = """
+            SELECT work_id, id, contributor_id, COALESCE(admin_entity_id, contributor_id), role,
+                   COALESCE(writer_share, 0), COALESCE(publisher_share, 0), COALESCE(controlled, FALSE)
+              FROM publ_split
+             WHERE active AND work_id = ANY(%s)
+        """
+        if controlled_only:
+            query += " AND controlled"
+        self.env.cr.execute(query + " ORDER BY work_id, sequence, id", [work_ids])
+
+        splits = {}
+        for work_id, *values in self.env.cr.fetchall():
+            columns = splits.get(work_id)
+            if columns is None:
+                columns = splits[work_id] = {column: [] for column in SPLIT_COLUMNS}
+            for column, value in zip(SPLIT_COLUMNS, values):
+                columns[column].append(value)
+        return splits
+
+    @api.model
+    def _get_publisher_portion(self):
+        """Return the configured publisher portion of net income, between 0 and 1."""
+        percentage = self.env['ir.config_parameter'].sudo().get_param(
+            'label_studio_publishing.publisher_share_percentage')
+        if not percentage:
+            return PUBLISHER_PORTION
+        return min(max(float(percentage) / 100.0, 0.0), 1.0)
+
+    @api.model
+    def _get_weights(self, columns, publisher_portion):
+        """Return the ``(split_id, payee_id, share_type, weight)`` rows of one work."""
+        rows = []
+        for split_id, contributor_id, writer_share in zip(
+                columns['split_ids'], columns['contributor_ids'], columns['writer_shares']):
+            if writer_share:
+                rows.append((split_id, contributor_id, 'writer',
+                             writer_share / 100.0 * (1.0 - publisher_portion)))
+        for split_id, payee_id, publisher_share in zip(
+                columns['split_ids'], columns['payee_ids'], columns['publisher_shares']):
+            if publisher_share:
+                rows.append((split_id, payee_id, 'publisher',
+                             publisher_share / 100.0 * publisher_portion))
+        return rows
+
+    @api.model
+    def _allocate(self, amounts, controlled_only=False, publisher_portion=None):
+        """Allocate net amounts to split payees.
+
+        ``amounts`` maps ``(key, work_id, currency_id)`` to a net amount, where
+        ``key`` is any grouping the caller needs back (a statement id, a
+        partner...). ``publisher_portion`` defaults to the configured publisher
+        share. Returns a list of dicts with ``key``, ``work_id``,
+        ``currency_id``, ``split_id``, ``partner_id``, ``share_type`` and
+        ``amount``. Shares that do not add up to 100% leave the remainder
+        unallocated.
+        """
+        if publisher_portion is None:
+            publisher_portion = self._get_publisher_portion()
+        splits = self._load_splits([work_id for _key, work_id, _currency in amounts], controlled_only)
+        currencies = {
+            currency.id: currency
+            for currency in self.env['res.currency'].browse(
+                {currency_id for _key, _work, currency_id in amounts}
+            )
+        }
+        weights_by_work = {
+            work_id: self._get_weights(columns, publisher_portion)
+            for work_id, columns in splits.items()
+        }
+
+        allocations = []
+        for (key, work_id, currency_id), amount in amounts.items():
+            rows = weights_by_work.get(work_id)
+            if not rows or not amount:
+                continue
+            parts = allocate_largest_remainder(
+                amount, [row[3] for row in rows], currencies[currency_id].rounding)
+            for (split_id, partner_id, share_type, _weight), part in zip(rows, parts):
+                allocations.append({
+                    'key': key,
+                    'work_id': work_id,
+                    'currency_id': currency_id,
+                    'split_id': split_id,
+                    'partner_id': partner_id,
+                    'share_type': share_type,
+                    'amount': part,
+                })
+        return allocations
+
+    @api.model
+    def _allocate_usage_lines(self, domain, groupby='statement_id', controlled_only=False,
+                              publisher_portion=None):
+        """Sum matched usage lines per work in SQL and allocate the totals to splits."""
+        groups = self.env['royalty.usage.line']._read_group(
+            domain + [('work_id', '!=', False)],
+            [groupby, 'work_id', 'currency_id'],
+            ['net_amount:sum'],
+        )
+        amounts = {
+            (key.id if isinstance(key, models.BaseModel) else key, work.id, currency.id): net_amount
+            for key, work, currency, net_amount in groups
+        }
+        return self._allocate(amounts, controlled_only=controlled_only,
+                              publisher_portion=publisher_portion)
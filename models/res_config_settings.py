@@ -37,6 +37,14 @@ class ResConfigSettings(models.TransientModel):
         help='Default number of months to hold reserves before release'
     )
 
+    # Publishing Settings
+    publisher_share_percentage = fields.Float(
+        string='Publisher Share (%)',
+        default=50.0,
+        config_parameter='label_studio_publishing.publisher_share_percentage',
+        help='Portion of a work\'s net income paid out as publisher share; the rest is the writer share'
+    )
+
     # Payment Settings
     minimum_payment_threshold = fields.Float(
         string='Minimum Payment Threshold',
@@ -52,6 +60,20 @@ class ResConfigSettings(models.TransientModel):
         help='Allow negative balances on royalty statements'
     )
 
+    isrc_registrant_code = fields.Char(
+        string='ISRC Registrant Code',
+        size=3,
+        config_parameter='label_studio_publishing.isrc_registrant_code',
+        help='Three-character registrant code assigned by the national ISRC agency'
+    )
+
+    prerender_statement_pdf = fields.Boolean(
+        string='Pre-render Statement PDFs',
+        default=False,
+        config_parameter='label_studio_publishing.prerender_statement_pdf',
+        help='Render and cache the statement PDF in the background when a statement is sent'
+    )
+
     # Cross-Collateralization
     enable_cross_collateralization = fields.Boolean(
         string='Enable Cross-Collateralization by Default',
@@ -105,6 +105,16 @@ class Partner(models.Model):
     work_count = fields.Integer(string='Works Count', compute='_compute_work_count')
     recording_count = fields.Integer(string='Recordings Count', compute='_compute_recording_count')
 
+    # Portal Home Counters (stored so portal home needs no count queries)
+    royalty_statement_ids = fields.One2many('royalty.statement', 'partner_id', string='Royalty Statements')
+    studio_booking_ids = fields.One2many('studio.booking', 'client_id', string='Studio Bookings')
+    portal_statement_count = fields.Integer(string='Portal Statements',
+                                            compute='_compute_portal_counters', store=True)
+    portal_pending_statement_count = fields.Integer(string='Portal Statements Pending Approval',
+                                                    compute='_compute_portal_counters', store=True)
+    portal_booking_count = fields.Integer(string='Portal Bookings',
+                                          compute='_compute_portal_counters', store=True)
+
     @api.depends('id')
     def _compute_deal_count(self):
         for partner in self:
@@ -132,6 +142,31 @@ class Partner(models.Model):
             # Count recordings where this partner is the main artist
             partner.recording_count = self.env['music.recording'].search_count([('main_artist_ids', 'in', partner.id)])
 
+    @api.depends('royalty_statement_ids.state', 'studio_booking_ids')
+    def _compute_portal_counters(self):
+        statement_counts = {}
+        pending_counts = {}
+        booking_counts = {}
+        partner_ids = self.ids
+        if partner_ids:
+            for partner, state, count in self.env['royalty.statement'].sudo()._read_group(
+                [('partner_id', 'in', partner_ids)], ['partner_id', 'state'], ['__count'],
+            ):
+                if state != 'cancelled':
+                    statement_counts[partner.id] = statement_counts.get(partner.id, 0) + count
+                if state == 'sent':
+                    pending_counts[partner.id] = count
+            booking_counts = {
+                partner.id: count
+                for partner, count in self.env['studio.booking'].sudo()._read_group(
+                    [('client_id', 'in', partner_ids)], ['client_id'], ['__count'],
+                )
+            }
+        for partner in self:
+            partner.portal_statement_count = statement_counts.get(partner.id, 0)
+            partner.portal_pending_statement_count = pending_counts.get(partner.id, 0)
+            partner.portal_booking_count = booking_counts.get(partner.id, 0)
+
     @api.constrains('ipi_number')
     def _check_ipi_number(self):
         """Validate IPI number format"""
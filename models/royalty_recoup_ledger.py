@@ -213,14 +213,15 @@ class RoyaltyRecoupLedger(models.Model):
                 'view_mode': 'form',
             }
 
-    def name_get(self):
-        """Custom name display"""
-        result = []
+    @api.depends('description', 'debit_amount', 'credit_amount', 'currency_id')
+    def _compute_display_name(self):
+        self.filtered('id').fetch(['description', 'debit_amount', 'credit_amount', 'currency_id'])
+        symbols = {currency.id: currency.symbol or '' for currency in self.currency_id}
         for ledger in self:
             name = f"{ledger.description}"
+            symbol = symbols.get(ledger.currency_id.id, '')
             if ledger.debit_amount > 0:
-                name = f"{name} (Debit: {ledger.currency_id.symbol}{ledger.debit_amount:.2f})"
+                name = f"{name} (Debit: {symbol}{ledger.debit_amount:.2f})"
             elif ledger.credit_amount > 0:
-                name = f"{name} (Credit: {ledger.currency_id.symbol}{ledger.credit_amount:.2f})"
-            result.append((ledger.id, name))
-        return result
\ No newline at end of file
+                name = f"{name} (Credit: {symbol}{ledger.credit_amount:.2f})"
+            ledger.display_name = name
\ No newline at end of file
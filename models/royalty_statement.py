@@ -1,7 +1,14 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
+import logging
+
 from odoo import api, fields, models, _
-from odoo.exceptions import ValidationError
+from odoo.exceptions import UserError, ValidationError
+
+_logger = logging.getLogger(__name__)
+
+STATEMENT_REPORT_XMLID = 'label_studio_publishing.action_report_royalty_statement'
 
 
 class RoyaltyStatement(models.Model):
@@ -81,6 +88,18 @@ class RoyaltyStatement(models.Model):
         'statement_id',
         string='Payments',
     )
+    summary_ids = fields.One2many(
+        'royalty.statement.summary',
+        'statement_id',
+        string='Usage Summary',
+        readonly=True,
+    )
+    summary_version = fields.Char(
+        string='Summary Version',
+        copy=False,
+        readonly=True,
+        help='Usage line version the stored summary was built from.',
+    )
     payment_ids = fields.Many2many(
         'royalty.payment',
         compute='_compute_payment_ids',
@@ -141,6 +160,21 @@ class RoyaltyStatement(models.Model):
     paid_date = fields.Date(string='Paid Date', tracking=True)
     note = fields.Html(string='Notes')
 
+    report_attachment_id = fields.Many2one(
+        'ir.attachment',
+        string='Cached Statement PDF',
+        copy=False,
+        ondelete='set null',
+        readonly=True,
+    )
+    report_cache_key = fields.Char(string='Cached PDF Version', copy=False, readonly=True)
+    report_prerender_pending = fields.Boolean(
+        string='PDF Pre-render Pending',
+        copy=False,
+        readonly=True,
+        help='Set when the statement is sent and the PDF should be rendered in the background.',
+    )
+
     @api.model_create_multi
     def create(self, vals_list):
         for vals in vals_list:
@@ -226,10 +260,13 @@ class RoyaltyStatement(models.Model):
     def action_mark_processing(self):
         self.write({'state': 'processing'})
         self._sync_usage_processing_flag()
+        self._refresh_summary()
 
     def action_mark_sent(self):
         self.write({'state': 'sent', 'sent_date': fields.Date.context_today(self)})
         self._sync_usage_processing_flag()
+        self._refresh_summary()
+        self._schedule_report_prerender()
 
     def action_mark_approved(self):
         self.write({'state': 'approved', 'approved_date': fields.Date.context_today(self)})
@@ -242,6 +279,21 @@ class RoyaltyStatement(models.Model):
         self.write({'state': 'cancelled'})
         self._sync_usage_processing_flag()
 
+    def action_create_publishing_run(self):
+        statements = self.filtered(lambda statement: statement.state != 'cancelled')
+        if not statements:
+            raise UserError(_('Select at least one statement that is not cancelled.'))
+        run = self.env['royalty.statement.run'].create({
+            'line_ids': [(0, 0, {'statement_id': statement.id}) for statement in statements],
+        })
+        return {
+            'name': _('Statement Publishing Run'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'royalty.statement.run',
+            'view_mode': 'form',
+            'res_id': run.id,
+        }
+
     def action_open_usage_lines(self):
         self.ensure_one()
         return {
@@ -273,3 +325,224 @@ class RoyaltyStatement(models.Model):
         self.ensure_one()
         return f"{self.name or 'royalty_statement'}"
 
+    # ------------------------------------------------------------------
+    # Usage summary
+    # ------------------------------------------------------------------
+
+    def _refresh_summary(self):
+        """Rebuild the stored usage summary from the statement's lines in SQL."""
+        if not self.ids:
+            return
+        self.env['royalty.usage.line'].flush_model()
+        self.flush_recordset(['currency_id'])
+        self.env.cr.execute(
+            "DELETE FROM royalty_statement_summary WHERE statement_id = ANY(%s)",
+            [self.ids],
+        )
+        self.env.cr.execute(
+            """
+            INSERT INTO royalty_statement_summary (
+                statement_id, recording_id, work_id, territory_code, service,
+                usage_type, currency_id, line_count, units, gross_amount, fees, net_amount
+            )
+            SELECT line.statement_id, line.recording_id, line.work_id, line.territory_code,
+                   line.service, line.usage_type, statement.currency_id, COUNT(*),
+                   COALESCE(SUM(line.units), 0), COALESCE(SUM(line.gross_amount), 0),
+                   COALESCE(SUM(line.fees), 0), COALESCE(SUM(line.net_amount), 0)
+              FROM royalty_usage_line line
+              JOIN royalty_statement statement ON statement.id = line.statement_id
+             WHERE line.statement_id = ANY(%s)
+          GROUP BY line.statement_id, line.recording_id, line.work_id, line.territory_code,
+                   line.service, line.usage_type, statement.currency_id
+            """,
+            [self.ids],
+        )
+        self.env['royalty.statement.summary'].invalidate_model()
+        self.invalidate_recordset(['summary_ids'])
+        versions = self._get_usage_versions()
+        for statement in self:
+            statement.summary_version = versions[statement.id]
+
+    def _get_usage_versions(self):
+        """Return ``{statement_id: version}`` from the line count and latest line write.
+
+        Adding, removing, re-matching or re-pricing a line changes the version,
+        whatever state the statement is in.
+        """
+        versions = dict.fromkeys(self.ids, '0|None')
+        if not self.ids:
+            return versions
+        self.env['royalty.usage.line'].flush_model()
+        self.env.cr.execute(
+            """
+            SELECT statement_id, COUNT(*), MAX(write_date)
+              FROM royalty_usage_line
+             WHERE statement_id = ANY(%s)
+          GROUP BY statement_id
+            """,
+            [self.ids],
+        )
+        for statement_id, line_count, line_write_date in self.env.cr.fetchall():
+            versions[statement_id] = f'{line_count}|{line_write_date}'
+        return versions
+
+    def _get_summary(self):
+        """Return the summary rows, rebuilding those built from an older set of lines."""
+        statements = self.sudo()
+        versions = statements._get_usage_versions()
+        stale = statements.filtered(lambda statement: statement.summary_version != versions[statement.id])
+        stale._refresh_summary()
+        return self.env['royalty.statement.summary'].search([('statement_id', 'in', self.ids)])
+
+    def _get_split_allocations(self, controlled_only=False, publisher_portion=None):
+        """Allocate the matched work income of these statements to publishing splits.
+
+        Returns the ``publ.split.resolver`` allocation rows, keyed by statement id.
+        """
+        return self.env['publ.split.resolver']._allocate_usage_lines(
+            [('statement_id', 'in', self.ids)],
+            groupby='statement_id',
+            controlled_only=controlled_only,
+            publisher_portion=publisher_portion,
+        )
+
+    def _get_split_version(self):
+        """Return a version string of the splits of the works on this statement."""
+        self.ensure_one()
+        self.env['royalty.usage.line'].flush_model(['statement_id', 'work_id'])
+        self.env['publ.split'].flush_model()
+        self.env.cr.execute("""
+            SELECT COUNT(*), MAX(write_date)
+              FROM publ_split
+             WHERE work_id IN (SELECT work_id FROM royalty_usage_line WHERE statement_id = %s)
+        """, [self.id])
+        count, last_write = self.env.cr.fetchone()
+        return f"{count}|{last_write or ''}"
+
+    # ------------------------------------------------------------------
+    # Rendered PDF cache
+    # ------------------------------------------------------------------
+
+    def _get_report_cache_key(self):
+        """Hash everything the rendered statement depends on.
+
+        Header fields, stored totals and state are read from the statement;
+        line edits never touch the statement row, so the usage line version
+        (count and latest write_date) is folded in, along with the splits and
+        publisher portion behind the publishing shares table.
+        """
+        self.ensure_one()
+        parts = [
+            self.id,
+            self.name,
+            self.partner_id.display_name,
+            self.period_start,
+            self.period_end,
+            self.state,
+            self.currency_id.id,
+            self.total_gross_amount,
+            self.total_fee_amount,
+            self.total_net_amount,
+            self.recouped_amount,
+            self.total_amount,
+            self.balance_due,
+            self._get_usage_versions()[self.id],
+            self._get_split_version(),
+            self.env['publ.split.resolver']._get_publisher_portion(),
+        ]
+        return hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+    def _get_report_pdf(self):
+        """Return the statement PDF, rendering it only when the cached copy is stale."""
+        self.ensure_one()
+        statement = self.sudo()
+        cache_key = statement._get_report_cache_key()
+        attachment = statement.report_attachment_id
+        if attachment and statement.report_cache_key == cache_key:
+            return attachment.raw
+
+        pdf_content, _report_type = self.env['ir.actions.report'].sudo()._render_qweb_pdf(
+            STATEMENT_REPORT_XMLID, statement.ids
+        )
+        new_attachment = self.env['ir.attachment'].sudo().create({
+            'name': f"{statement._get_report_base_filename()}.pdf",
+            'type': 'binary',
+            'raw': pdf_content,
+            'mimetype': 'application/pdf',
+            'res_model': statement._name,
+            'res_id': statement.id,
+        })
+        statement.write({
+            'report_attachment_id': new_attachment.id,
+            'report_cache_key': cache_key,
+            'report_prerender_pending': False,
+        })
+        if attachment:
+            attachment.unlink()
+        return pdf_content
+
+    def _schedule_report_prerender(self):
+        if self.env.context.get('skip_report_prerender'):
+            return
+        prerender = self.env['ir.config_parameter'].sudo().get_param(
+            'label_studio_publishing.prerender_statement_pdf'
+        )
+        if not prerender:
+            return
+        self.write({'report_prerender_pending': True})
+        cron = self.env.ref('label_studio_publishing.cron_royalty_statement_prerender', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+
+    @api.model
+    def _cron_prerender_report_pdf(self, batch_size=20):
+        """Render PDFs for statements flagged when they were sent."""
+        statements = self.search([('report_prerender_pending', '=', True)], limit=batch_size)
+        for statement in statements:
+            try:
+                statement._get_report_pdf()
+                self.env.cr.commit()
+            except Exception:
+                self.env.cr.rollback()
+                _logger.exception('Failed to pre-render royalty statement %s', statement.id)
+                statement.write({'report_prerender_pending': False})
+                self.env.cr.commit()
+        if len(statements) == batch_size:
+            self.env.ref('label_studio_publishing.cron_royalty_statement_prerender')._trigger()
+
+
+class RoyaltyStatementSummary(models.Model):
+    _name = 'royalty.statement.summary'
+    _description = 'Royalty Statement Usage Summary'
+    _order = 'statement_id, net_amount desc'
+    _log_access = False
+
+    statement_id = fields.Many2one(
+        'royalty.statement',
+        string='Statement',
+        required=True,
+        ondelete='cascade',
+        index=True,
+    )
+    recording_id = fields.Many2one('music.recording', string='Recording', ondelete='set null')
+    work_id = fields.Many2one('music.work', string='Work', ondelete='set null')
+    territory_code = fields.Char(string='Territory Code', size=2)
+    service = fields.Char(string='Service/DSP')
+    usage_type = fields.Selection(
+        selection=lambda self: self.env['royalty.usage.line']._fields['usage_type'].selection,
+        string='Usage Type',
+    )
+    currency_id = fields.Many2one('res.currency', string='Currency')
+    line_count = fields.Integer(string='Usage Lines')
+    units = fields.Integer(string='Units/Plays')
+    gross_amount = fields.Monetary(string='Gross Amount', currency_field='currency_id')
+    fees = fields.Monetary(string='Fees/Deductions', currency_field='currency_id')
+    net_amount = fields.Monetary(string='Net Amount', currency_field='currency_id')
+
+    def _get_title(self):
+        self.ensure_one()
+        if self.recording_id:
+            return self.recording_id.title
+        if self.work_id:
+            return self.work_id.title
+        return _('Unmatched')
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+# Identical worker crons (data/ir_cron_data.xml). Odoo runs one job per cron
+# record at a time, so a run renders in parallel only across distinct records,
+# up to max_cron_threads; add a cron record here to add a worker.
+STATEMENT_RUN_WORKER_CRONS = (
+    'label_studio_publishing.cron_royalty_statement_run',
+    'label_studio_publishing.cron_royalty_statement_run_worker_2',
+    'label_studio_publishing.cron_royalty_statement_run_worker_3',
+    'label_studio_publishing.cron_royalty_statement_run_worker_4',
+)
+
+
+class RoyaltyStatementRun(models.Model):
+    _name = 'royalty.statement.run'
+    _description = 'Royalty Statement Publishing Run'
+    _inherit = ['mail.thread']
+    _order = 'create_date desc, id desc'
+
+    name = fields.Char(
+        string='Run Reference',
+        required=True,
+        copy=False,
+        default=lambda self: _('New'),
+    )
+    company_id = fields.Many2one(
+        'res.company',
+        string='Company',
+        required=True,
+        default=lambda self: self.env.company,
+    )
+    state = fields.Selection(
+        [
+            ('draft', 'Draft'),
+            ('running', 'Running'),
+            ('done', 'Done'),
+            ('cancelled', 'Cancelled'),
+        ],
+        string='Status',
+        default='draft',
+        tracking=True,
+    )
+    line_ids = fields.One2many(
+        'royalty.statement.run.line',
+        'run_id',
+        string='Statements',
+    )
+    send_email = fields.Boolean(string='Email Statements', default=True)
+    mail_template_id = fields.Many2one(
+        'mail.template',
+        string='Email Template',
+        domain=[('model', '=', 'royalty.statement')],
+        default=lambda self: self.env.ref(
+            'label_studio_publishing.mail_template_royalty_statement', raise_if_not_found=False
+        ),
+    )
+    batch_size = fields.Integer(
+        string='Batch Size',
+        default=25,
+        help='Statements claimed by a worker per transaction.',
+    )
+
+    started_at = fields.Datetime(string='Started', readonly=True, copy=False)
+    finished_at = fields.Datetime(string='Finished', readonly=True, copy=False)
+    statement_count = fields.Integer(string='Statements', compute='_compute_progress')
+    pending_count = fields.Integer(string='Pending', compute='_compute_progress')
+    done_count = fields.Integer(string='Published', compute='_compute_progress')
+    failed_count = fields.Integer(string='Failed', compute='_compute_progress')
+    progress = fields.Float(string='Progress (%)', compute='_compute_progress')
+    throughput = fields.Float(
+        string='Throughput (statements/min)',
+        compute='_compute_progress',
+        digits=(12, 2),
+    )
+    avg_render_seconds = fields.Float(
+        string='Avg. Render Time (s)',
+        compute='_compute_progress',
+        digits=(12, 3),
+    )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get('name', _('New')) == _('New'):
+                vals['name'] = self.env['ir.sequence'].next_by_code('royalty.statement.run') or _('New')
+        return super().create(vals_list)
+
+    def _compute_progress(self):
+        counts = {run.id: {} for run in self}
+        render_totals = {}
+        if self.ids:
+            groups = self.env['royalty.statement.run.line']._read_group(
+                [('run_id', 'in', self.ids)],
+                ['run_id', 'state'],
+                ['__count', 'render_seconds:sum'],
+            )
+            for run, state, count, render_seconds in groups:
+                counts[run.id][state] = count
+                render_totals[run.id] = render_totals.get(run.id, 0.0) + render_seconds
+        now = fields.Datetime.now()
+        for run in self:
+            run_counts = counts.get(run.id, {})
+            total = sum(run_counts.values())
+            done = run_counts.get('done', 0)
+            failed = run_counts.get('failed', 0)
+            processed = done + failed
+            run.statement_count = total
+            run.pending_count = run_counts.get('pending', 0)
+            run.done_count = done
+            run.failed_count = failed
+            run.progress = (processed / total * 100.0) if total else 0.0
+            run.avg_render_seconds = render_totals.get(run.id, 0.0) / done if done else 0.0
+            elapsed = ((run.finished_at or now) - run.started_at).total_seconds() if run.started_at else 0.0
+            run.throughput = processed / elapsed * 60.0 if elapsed > 0 else 0.0
+
+    def action_start(self):
+        for run in self:
+            if not run.line_ids:
+                raise UserError(_('Add at least one statement before starting the run.'))
+            if run.send_email and not run.mail_template_id:
+                raise UserError(_('Select an email template or disable emailing.'))
+        self.filtered(lambda run: run.state == 'draft').write({
+            'state': 'running',
+            'started_at': fields.Datetime.now(),
+        })
+        self._trigger_workers()
+
+    def action_retry_failed(self):
+        self.line_ids.filtered(lambda line: line.state == 'failed').write({
+            'state': 'pending',
+            'error_message': False,
+        })
+        self.filtered(lambda run: run.state == 'done').write({'state': 'running', 'finished_at': False})
+        self._trigger_workers()
+
+    def action_cancel(self):
+        self.write({'state': 'cancelled'})
+
+    def action_open_statements(self):
+        self.ensure_one()
+        return {
+            'name': _('Statements'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'royalty.statement',
+            'view_mode': 'tree,form',
+            'domain': [('id', 'in', self.line_ids.statement_id.ids)],
+        }
+
+    @api.model
+    def _trigger_workers(self):
+        """Wake every worker cron so idle cron threads pick up batches concurrently."""
+        for xmlid in STATEMENT_RUN_WORKER_CRONS:
+            cron = self.env.ref(xmlid, raise_if_not_found=False)
+            if cron:
+                cron._trigger()
+
+    def _claim_lines(self, limit):
+        """Lock a batch of pending lines, skipping rows held by other workers."""
+        self.env['royalty.statement.run.line'].flush_model(['state', 'run_id'])
+        self.env.cr.execute(
+            """
+            SELECT line.id
+              FROM royalty_statement_run_line line
+              JOIN royalty_statement_run run ON run.id = line.run_id
+             WHERE line.state = 'pending'
+               AND run.state = 'running'
+               AND line.run_id = ANY(%s)
+             ORDER BY line.id
+             LIMIT %s
+               FOR UPDATE OF line SKIP LOCKED
+            """,
+            [self.ids, limit],
+        )
+        return self.env['royalty.statement.run.line'].browse(row[0] for row in self.env.cr.fetchall())
+
+    def _process_batch(self):
+        """Publish one claimed batch per run; return True while work remains."""
+        remaining = False
+        for run in self.filtered(lambda r: r.state == 'running'):
+            lines = run._claim_lines(max(run.batch_size, 1))
+            if not lines:
+                if not self.env['royalty.statement.run.line'].search_count(
+                    [('run_id', '=', run.id), ('state', '=', 'pending')], limit=1
+                ):
+                    run.write({'state': 'done', 'finished_at': fields.Datetime.now()})
+                continue
+            remaining = True
+            # Warm the cache for the whole batch before rendering statement by statement
+            lines.statement_id.fetch(['name', 'state', 'partner_id', 'currency_id', 'total_amount'])
+            for line in lines:
+                line._publish()
+        return remaining
+
+    @api.model
+    def _cron_process_runs(self, max_batches=20):
+        """Worker entry point: drain running publishing runs batch by batch.
+
+        Each of the STATEMENT_RUN_WORKER_CRONS runs this. Batches are claimed
+        with SKIP LOCKED and committed on their own, so the workers share a run
+        without sending a statement twice.
+        """
+        runs = self.search([('state', '=', 'running')])
+        for _batch in range(max_batches):
+            if not runs._process_batch():
+                break
+            self.env.cr.commit()
+        else:
+            self._trigger_workers()
+
+
+class RoyaltyStatementRunLine(models.Model):
+    _name = 'royalty.statement.run.line'
+    _description = 'Royalty Statement Publishing Run Line'
+    _order = 'id'
+
+    run_id = fields.Many2one(
+        'royalty.statement.run',
+        string='Run',
+        required=True,
+        ondelete='cascade',
+        index=True,
+    )
+    statement_id = fields.Many2one(
+        'royalty.statement',
+        string='Statement',
+        required=True,
+        ondelete='cascade',
+    )
+    partner_id = fields.Many2one(related='statement_id.partner_id', string='Recipient')
+    state = fields.Selection(
+        [
+            ('pending', 'Pending'),
+            ('done', 'Published'),
+            ('failed', 'Failed'),
+        ],
+        string='Status',
+        default='pending',
+        required=True,
+        index=True,
+    )
+    attachment_id = fields.Many2one('ir.attachment', string='Statement PDF', readonly=True)
+    mail_id = fields.Many2one('mail.mail', string='Queued Email', readonly=True)
+    render_seconds = fields.Float(string='Render Time (s)', digits=(12, 3), readonly=True)
+    error_message = fields.Text(string='Error', readonly=True)
+
+    _run_statement_uniq = models.Constraint(
+        'unique(run_id, statement_id)',
+        'A statement can only appear once per run.',
+    )
+
+    def _publish(self):
+        """Render, attach and queue the email for a single statement."""
+        self.ensure_one()
+        statement = self.statement_id
+        try:
+            with self.env.cr.savepoint():
+                if statement.state in ('draft', 'processing'):
+                    statement.with_context(skip_report_prerender=True).action_mark_sent()
+                started = time.perf_counter()
+                statement._get_report_pdf()
+                render_seconds = time.perf_counter() - started
+                attachment = statement.sudo().report_attachment_id
+                mail = self.env['mail.mail']
+                if self.run_id.send_email:
+                    mail_id = self.run_id.mail_template_id.send_mail(
+                        statement.id,
+                        force_send=False,
+                        email_values={'attachment_ids': attachment.ids},
+                    )
+                    mail = mail.browse(mail_id)
+                self.write({
+                    'state': 'done',
+                    'attachment_id': attachment.id,
+                    'mail_id': mail.id,
+                    'render_seconds': render_seconds,
+                    'error_message': False,
+                })
+        except Exception as error:
+            _logger.exception('Publishing royalty statement %s failed', statement.id)
+            self.write({'state': 'failed', 'error_message': str(error)})
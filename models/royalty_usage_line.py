@@ -1,14 +1,23 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api, _
+from collections import defaultdict
+
+from odoo import models, fields, api, tools, _
 from odoo.exceptions import ValidationError
+from odoo.tools.sql import create_index, create_unique_index
+
+from .catalog_dedup import normalize_code, normalize_recording_title
+
+# Changed recordings and works re-matched per cron transaction
+REMATCH_BATCH_SIZE = 200
 
 
 class RoyaltyUsageLine(models.Model):
     _name = 'royalty.usage.line'
     _description = 'Royalty Usage Line'
     _order = 'period_start desc, id desc'
-    _rec_name = 'display_name'
+    _rec_name = 'track_name'
+    _rec_names_search = ['track_name', 'artist_name', 'isrc']
 
     # Source Information
     source_type = fields.Selection([
@@ -48,6 +57,11 @@ class RoyaltyUsageLine(models.Model):
     iswc = fields.Char(string='ISWC', index=True)
     upc = fields.Char(string='UPC/EAN', index=True)
     
+    # Normalized keys compared with catalog codes and title keys (partial indexes in init)
+    isrc_key = fields.Char(string='ISRC Key', compute='_compute_match_keys', store=True)
+    iswc_key = fields.Char(string='ISWC Key', compute='_compute_match_keys', store=True)
+    title_key = fields.Char(string='Title Key', compute='_compute_match_keys', store=True)
+    
     # Matched Catalog Items
     recording_id = fields.Many2one('music.recording', string='Matched Recording', index=True)
     work_id = fields.Many2one('music.work', string='Matched Work', index=True)
@@ -100,20 +114,50 @@ class RoyaltyUsageLine(models.Model):
     import_batch_id = fields.Char(string='Import Batch ID', index=True)
     
     # Reconciliation
-    statement_id = fields.Many2one('royalty.statement', string='Royalty Statement')
+    statement_id = fields.Many2one('royalty.statement', string='Royalty Statement', index=True)
     payment_id = fields.Many2one('royalty.payment', string='Payment')
     
     # Computed Fields
-    display_name = fields.Char(string='Display Name', compute='_compute_display_name', store=True)
+    # Rendered on read only: storing it rewrote every line on each import, fee or FX change
+    display_name = fields.Char(string='Display Name', compute='_compute_display_name')
+    
+    # Ownership Index
+    partner_rel_ids = fields.One2many('royalty.usage.partner.rel', 'usage_line_id',
+                                      string='Rights Holders', readonly=True)
     
     # Notes
     notes = fields.Text(string='Notes')
     
+    def init(self):
+        for column in ('isrc_key', 'iswc_key', 'title_key'):
+            create_index(self.env.cr, f'royalty_usage_line_unmatched_{column}_idx', self._table,
+                         [column], where="matched_state = 'unmatched'")
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        self.env['royalty.usage.partner.rel']._refresh_index('id', lines.ids)
+        return lines
+
+    def write(self, vals):
+        res = super().write(vals)
+        if {'recording_id', 'work_id', 'period_start'} & set(vals) \
+                and not self.env.context.get('skip_usage_partner_index'):
+            self.env['royalty.usage.partner.rel']._refresh_index('id', self.ids)
+        return res
+
     @api.depends('gross_amount', 'fees')
     def _compute_net_amount(self):
         for line in self:
             line.net_amount = line.gross_amount - line.fees
 
+    @api.depends('isrc', 'iswc', 'track_name')
+    def _compute_match_keys(self):
+        for line in self:
+            line.isrc_key = normalize_code(line.isrc) or False
+            line.iswc_key = normalize_code(line.iswc) or False
+            line.title_key = normalize_recording_title(line.track_name) or False
+
     @api.depends('net_amount', 'exchange_rate')
     def _compute_net_amount_company_currency(self):
         for line in self:
@@ -122,8 +166,16 @@ class RoyaltyUsageLine(models.Model):
             else:
                 line.net_amount_company_currency = line.net_amount * line.exchange_rate
 
-    @api.depends('track_name', 'artist_name', 'usage_type', 'period_start', 'net_amount')
+    @api.model
+    @tools.ormcache('field_name', 'self.env.lang')
+    def _get_selection_labels(self, field_name):
+        """Translated {value: label} map of a selection field, built once per language"""
+        return dict(self._fields[field_name]._description_selection(self.env))
+
+    @api.depends('track_name', 'artist_name', 'usage_type', 'period_start', 'net_amount', 'currency_id')
     def _compute_display_name(self):
+        usage_labels = self._get_selection_labels('usage_type')
+        symbols = {currency.id: currency.symbol or '' for currency in self.currency_id}
         for line in self:
             parts = []
             if line.artist_name and line.track_name:
@@ -132,13 +184,13 @@ class RoyaltyUsageLine(models.Model):
                 parts.append(line.track_name)
             
             if line.usage_type:
-                parts.append(f"({dict(line._fields['usage_type'].selection)[line.usage_type]})")
+                parts.append(f"({usage_labels.get(line.usage_type, line.usage_type)})")
             
             if line.period_start:
                 parts.append(f"[{line.period_start.strftime('%Y-%m')}]")
             
             if line.net_amount:
-                parts.append(f"{line.currency_id.symbol}{line.net_amount:.2f}")
+                parts.append(f"{symbols.get(line.currency_id.id, '')}{line.net_amount:.2f}")
             
             line.display_name = ' '.join(parts) or 'Usage Line'
 
@@ -251,8 +303,134 @@ class RoyaltyUsageLine(models.Model):
             'matched': len(unmatched_lines.filtered(lambda l: l.matched_state == 'auto_matched'))
         }
 
+    @api.model
+    def _trigger_rematch(self):
+        cron = self.env.ref('label_studio_publishing.cron_royalty_usage_rematch', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+
+    @api.model
+    def _cron_rematch_catalog_changes(self, batch_size=REMATCH_BATCH_SIZE):
+        """Match unmatched lines against recordings and works flagged as changed.
+
+        Only lines whose normalized keys equal the changed catalog keys are
+        read, through the partial indexes on unmatched lines, so a fix to one
+        ISRC does not rescan the whole unmatched backlog.
+        """
+        recordings = self.env['music.recording'].with_context(active_test=False).search(
+            [('rematch_pending', '=', True)], limit=batch_size)
+        works = self.env['music.work'].with_context(active_test=False).search(
+            [('rematch_pending', '=', True)], limit=batch_size)
+        recordings.write({'rematch_pending': False})
+        works.write({'rematch_pending': False})
+
+        matched = self._rematch_recordings(recordings.filtered('active'))
+        matched += self._rematch_works(works.filtered('active'))
+        if len(recordings) == batch_size or len(works) == batch_size:
+            self._trigger_rematch()
+        return {
+            'recordings': len(recordings),
+            'works': len(works),
+            'matched': matched,
+        }
+
+    @api.model
+    def _rematch_recordings(self, recordings):
+        """Match unmatched lines by ISRC, then by title key and artist."""
+        if not recordings:
+            return 0
+        recordings.fetch(['isrc', 'title_key', 'work_id'])
+        matched = 0
+
+        by_isrc = {}
+        for recording in recordings:
+            key = normalize_code(recording.isrc)
+            if key:
+                by_isrc.setdefault(key, recording)
+        if by_isrc:
+            lines = self.search_fetch([
+                ('matched_state', '=', 'unmatched'),
+                ('isrc_key', 'in', list(by_isrc)),
+            ], ['isrc_key'])
+            line_ids = defaultdict(list)
+            for line in lines:
+                line_ids[by_isrc[line.isrc_key]].append(line.id)
+            matched += self._write_recording_matches(line_ids, 1.0)
+
+        title_keys = list({key for key in recordings.mapped('title_key') if key})
+        if title_keys:
+            lines = self.search_fetch([
+                ('matched_state', '=', 'unmatched'),
+                ('title_key', 'in', title_keys),
+                ('artist_name', '!=', False),
+            ], ['title_key', 'artist_name'])
+            if lines:
+                # Every recording sharing the key competes, so ambiguous titles stay unmatched
+                candidates = defaultdict(list)
+                for candidate in self.env['music.recording'].search_fetch(
+                        [('title_key', 'in', title_keys)], ['title_key', 'work_id', 'main_artist_ids']):
+                    artists = [name.lower() for name in candidate.main_artist_ids.mapped('name') if name]
+                    candidates[candidate.title_key].append((candidate, artists))
+                line_ids = defaultdict(list)
+                for line in lines:
+                    artist = line.artist_name.lower()
+                    found = [
+                        candidate for candidate, artists in candidates[line.title_key]
+                        if any(artist in name for name in artists)
+                    ]
+                    if len(found) == 1:
+                        line_ids[found[0]].append(line.id)
+                matched += self._write_recording_matches(line_ids, 0.8)
+        return matched
+
+    @api.model
+    def _write_recording_matches(self, line_ids_by_recording, confidence):
+        # The ownership index is rebuilt once for the batch, not per recording
+        lines = self.with_context(skip_usage_partner_index=True)
+        all_ids = []
+        for recording, line_ids in line_ids_by_recording.items():
+            lines.browse(line_ids).write({
+                'recording_id': recording.id,
+                'work_id': recording.work_id.id,
+                'confidence_score': confidence,
+                'matched_state': 'auto_matched',
+            })
+            all_ids += line_ids
+        self.env['royalty.usage.partner.rel']._refresh_index('id', all_ids)
+        return len(all_ids)
+
+    @api.model
+    def _rematch_works(self, works):
+        """Match unmatched lines without a work by ISWC."""
+        by_iswc = {}
+        for work in works:
+            key = normalize_code(work.iswc)
+            if key:
+                by_iswc.setdefault(key, work)
+        if not by_iswc:
+            return 0
+        lines = self.search_fetch([
+            ('matched_state', '=', 'unmatched'),
+            ('work_id', '=', False),
+            ('iswc_key', 'in', list(by_iswc)),
+        ], ['iswc_key'])
+        line_ids = defaultdict(list)
+        for line in lines:
+            line_ids[by_iswc[line.iswc_key]].append(line.id)
+        for work, ids in line_ids.items():
+            self.with_context(skip_usage_partner_index=True).browse(ids).write({
+                'work_id': work.id,
+                'confidence_score': 1.0,
+                'matched_state': 'auto_matched',
+            })
+        self.env['royalty.usage.partner.rel']._refresh_index('id', lines.ids)
+        return len(lines)
+
     def get_effective_splits(self):
-        """Get effective splits for this usage line"""
+        """Get effective splits for this usage line.
+
+        Use ``publ.split.resolver`` to allocate many lines at once.
+        """
         self.ensure_one()
         
         splits = []
@@ -267,4 +445,91 @@ class RoyaltyUsageLine(models.Model):
             ])
             # This would return deal-based splits
             
-        return splits
\ No newline at end of file
+        return splits
+
+
+class RoyaltyUsagePartnerRel(models.Model):
+    """Denormalized usage line ownership, one row per (line, partner, role).
+
+    Rows are rebuilt in SQL whenever a line's match changes or the artists
+    and writers of a matched recording or work change, so portal queries
+    can filter on a single indexed partner column instead of joining
+    through the catalog many2many tables.
+    """
+    _name = 'royalty.usage.partner.rel'
+    _description = 'Royalty Usage Ownership Index'
+    _order = 'period_start desc, usage_line_id desc'
+    _log_access = False
+
+    usage_line_id = fields.Many2one('royalty.usage.line', string='Usage Line', required=True,
+                                    ondelete='cascade', index=True)
+    partner_id = fields.Many2one('res.partner', string='Rights Holder', required=True,
+                                 ondelete='cascade', index=True)
+    role = fields.Selection([
+        ('main_artist', 'Main Artist'),
+        ('featured_artist', 'Featured Artist'),
+        ('writer', 'Writer'),
+    ], string='Role', required=True)
+    period_start = fields.Date(string='Period Start',
+                               help='Copied from the usage line for recent-activity ordering')
+
+    # Usage line column -> catalog relation table feeding each role
+    _ROLE_SOURCES = [
+        ('main_artist', 'recording_id', 'recording_main_artist_rel', 'recording_id'),
+        ('featured_artist', 'recording_id', 'recording_featured_artist_rel', 'recording_id'),
+        ('writer', 'work_id', 'work_composer_rel', 'work_id'),
+    ]
+
+    def init(self):
+        create_unique_index(self.env.cr, 'royalty_usage_partner_rel_line_partner_role_uniq',
+                            self._table, ['usage_line_id', 'partner_id', 'role'])
+        create_index(self.env.cr, 'royalty_usage_partner_rel_partner_period_idx',
+                     self._table, ['partner_id', 'period_start DESC'])
+        # Backfill on first install/upgrade
+        self.env.cr.execute(f"SELECT 1 FROM {self._table} LIMIT 1")
+        if not self.env.cr.fetchone():
+            self._refresh_index()
+
+    @api.model
+    def _refresh_index(self, column=None, ids=None):
+        """Rebuild index rows for the usage lines whose ``column`` is in ``ids``.
+
+        ``column`` is one of ``id``, ``recording_id`` or ``work_id`` on
+        ``royalty.usage.line``; without a column the whole index is rebuilt.
+        """
+        if column is not None:
+            if column not in ('id', 'recording_id', 'work_id'):
+                raise ValueError(f"Cannot refresh usage ownership index by {column!r}")
+            if not ids:
+                return
+        # Flush only what the rebuild reads: the usage lines and the catalog
+        # relation tables behind each role
+        self.env['royalty.usage.line'].flush_model(['recording_id', 'work_id', 'period_start'])
+        self.env['music.recording'].flush_model(['main_artist_ids', 'featured_artist_ids'])
+        self.env['music.work'].flush_model(['composer_ids'])
+        cr = self.env.cr
+
+        line_filter = f"l.{column} = ANY(%s)" if column else "TRUE"
+        params = [list(ids)] if column else []
+
+        cr.execute(f"""
+            DELETE FROM {self._table} rel
+                  USING royalty_usage_line l
+                  WHERE rel.usage_line_id = l.id AND {line_filter}
+        """, params)
+
+        selects = []
+        for role, line_column, rel_table, rel_column in self._ROLE_SOURCES:
+            selects.append(f"""
+                SELECT l.id, r.partner_id, '{role}', l.period_start
+                  FROM royalty_usage_line l
+                  JOIN {rel_table} r ON r.{rel_column} = l.{line_column}
+                 WHERE {line_filter}
+            """)
+        cr.execute(
+            f"INSERT INTO {self._table} (usage_line_id, partner_id, role, period_start) "
+            + " UNION ".join(selects),
+            params * len(selects),
+        )
+        self.invalidate_model()
+        self.env['royalty.usage.line'].invalidate_model(['partner_rel_ids'])
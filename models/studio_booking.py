@@ -1,9 +1,22 @@
 # -*- coding: utf-8 -*-
 
+import logging
+from collections import defaultdict
+
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
+from odoo.tools.sql import create_index
 from datetime import datetime, timedelta
 
+from .studio_room import ROOM_BLOCKING_STATUSES
+
+_logger = logging.getLogger(__name__)
+
+# Hours before the session start at which each reminder goes out
+REMINDER_24H_OFFSET = timedelta(hours=24)
+REMINDER_2H_OFFSET = timedelta(hours=2)
+REMINDER_BATCH_SIZE = 500
+
 
 class StudioBooking(models.Model):
     _name = 'studio.booking'
@@ -11,6 +24,16 @@ class StudioBooking(models.Model):
     _inherit = ['mail.thread', 'mail.activity.mixin']
     _order = 'start_datetime desc'
 
+    # Enforced by PostgreSQL so concurrent transactions cannot double-book a
+    # room; the GiST index behind it also serves room availability lookups.
+    # _check_dates repeats the test in case the constraint could not be created.
+    _room_period_no_overlap = models.Constraint(
+        "EXCLUDE USING gist (room_id WITH =, tsrange(start_datetime, end_datetime, '[)') WITH &&) "
+        "WHERE (status IN (%s) AND end_datetime > start_datetime)"
+        % ', '.join("'%s'" % status for status in ROOM_BLOCKING_STATUSES),
+        'This room is already booked for the selected time period',
+    )
+
     name = fields.Char(string='Booking Reference', required=True, copy=False,
                       default=lambda self: _('New'))
     
@@ -21,7 +44,7 @@ class StudioBooking(models.Model):
     contact_email = fields.Char(string='Contact Email')
     
     # Booking Details
-    room_id = fields.Many2one('studio.room', string='Room', required=True, tracking=True)
+    room_id = fields.Many2one('studio.room', string='Room', required=True, tracking=True, index=True)
     engineer_id = fields.Many2one('res.partner', string='Engineer',
                                  domain=[('is_engineer', '=', True)])
     
@@ -93,6 +116,11 @@ class StudioBooking(models.Model):
     
     # Invoicing
     invoice_ids = fields.One2many('account.move', 'studio_booking_id', string='Invoices')
+    deposit_invoice_id = fields.Many2one('account.move', string='Deposit Invoice', copy=False,
+                                         readonly=True, index=True, ondelete='set null',
+                                         help='Deposit invoice, possibly shared by every booking of a block.')
+    final_invoice_id = fields.Many2one('account.move', string='Final Invoice', copy=False,
+                                       readonly=True, index=True, ondelete='set null')
     invoice_count = fields.Integer(string='Invoice Count', compute='_compute_invoice_count')
     invoiced = fields.Boolean(string='Invoiced', compute='_compute_invoiced', store=True)
     
@@ -108,12 +136,86 @@ class StudioBooking(models.Model):
     # Reminders
     reminder_24h_sent = fields.Boolean(string='24h Reminder Sent', default=False)
     reminder_2h_sent = fields.Boolean(string='2h Reminder Sent', default=False)
+    next_reminder_at = fields.Datetime(
+        string='Next Reminder At',
+        compute='_compute_next_reminder_at',
+        store=True,
+        help='When the next pending reminder is due; empty when nothing is left to send.',
+    )
+
+    # Block / recurring bookings
+    block_reference = fields.Char(
+        string='Block Reference',
+        index=True,
+        copy=False,
+        readonly=True,
+        help='Shared by all occurrences created from one recurring or block booking.',
+    )
     
-    @api.model
-    def create(self, vals):
-        if vals.get('name', _('New')) == _('New'):
-            vals['name'] = self.env['ir.sequence'].next_by_code('studio.booking') or _('New')
-        return super().create(vals)
+    def _auto_init(self):
+        # Needed by the exclusion constraint to mix equality on room_id with range overlap
+        self.env.cr.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        return super()._auto_init()
+
+    def init(self):
+        # Only bookings with a pending reminder are indexed, so the queue stays small
+        create_index(self.env.cr, 'studio_booking_next_reminder_at_idx', self._table,
+                     ['next_reminder_at'], where='next_reminder_at IS NOT NULL')
+        # Lets the slot finder read MAX(write_date) as its schedule version cheaply
+        create_index(self.env.cr, 'studio_booking_write_date_idx', self._table, ['write_date'])
+        self._log_overlapping_bookings()
+
+    def _log_overlapping_bookings(self):
+        """Report the bookings that keep the overlap constraint from being created."""
+        self.env.cr.execute(
+            "SELECT 1 FROM pg_constraint WHERE conname = %s",
+            [f'{self._table}_room_period_no_overlap'],
+        )
+        if self.env.cr.fetchone():
+            return
+        self.env.cr.execute(
+            """
+            SELECT a.id, b.id, a.room_id
+              FROM studio_booking a
+              JOIN studio_booking b
+                ON b.room_id = a.room_id
+               AND b.id > a.id
+               AND b.status IN %(statuses)s
+               AND b.start_datetime < a.end_datetime
+               AND b.end_datetime > a.start_datetime
+             WHERE a.status IN %(statuses)s
+               AND a.end_datetime > a.start_datetime
+               AND b.end_datetime > b.start_datetime
+             ORDER BY a.room_id, a.id
+            """,
+            {'statuses': ROOM_BLOCKING_STATUSES},
+        )
+        conflicts = self.env.cr.fetchall()
+        if conflicts:
+            _logger.warning(
+                'Room overlap constraint not created: %s pairs of active bookings overlap '
+                '(booking, booking, room): %s. Reschedule or cancel them and update the module; '
+                'overlaps are checked in Python until then.',
+                len(conflicts), conflicts[:50],
+            )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if vals.get('name', _('New')) == _('New'):
+                vals['name'] = self.env['ir.sequence'].next_by_code('studio.booking') or _('New')
+        return super().create(vals_list)
+
+    def write(self, vals):
+        # A rescheduled session needs its reminders sent again
+        if 'start_datetime' in vals and 'reminder_24h_sent' not in vals:
+            vals = dict(vals, reminder_24h_sent=False, reminder_2h_sent=False)
+        return super().write(vals)
+
+    def unlink(self):
+        res = super().unlink()
+        self.env['studio.slot.finder']._bump_schedule_deletion_token()
+        return res
 
     @api.depends('start_datetime', 'end_datetime')
     def _compute_duration(self):
@@ -133,6 +235,17 @@ class StudioBooking(models.Model):
             booking.tax_amount = booking.subtotal * 0.10  # 10% tax
             booking.total_amount = booking.subtotal + booking.tax_amount
 
+    @api.depends('status', 'start_datetime', 'reminder_24h_sent', 'reminder_2h_sent')
+    def _compute_next_reminder_at(self):
+        for booking in self:
+            next_reminder_at = False
+            if booking.status == 'confirmed' and booking.start_datetime:
+                if not booking.reminder_24h_sent:
+                    next_reminder_at = booking.start_datetime - REMINDER_24H_OFFSET
+                elif not booking.reminder_2h_sent:
+                    next_reminder_at = booking.start_datetime - REMINDER_2H_OFFSET
+            booking.next_reminder_at = next_reminder_at
+
     @api.depends('total_amount', 'deposit_percentage')
     def _compute_deposit(self):
         for booking in self:
@@ -141,39 +254,50 @@ class StudioBooking(models.Model):
             else:
                 booking.deposit_amount = 0.0
 
-    @api.depends('invoice_ids')
+    @api.depends('invoice_ids', 'deposit_invoice_id', 'final_invoice_id')
     def _compute_invoice_count(self):
         for booking in self:
-            booking.invoice_count = len(booking.invoice_ids)
+            booking.invoice_count = len(booking.invoice_ids | booking.deposit_invoice_id | booking.final_invoice_id)
 
-    @api.depends('invoice_ids.payment_state')
+    @api.depends('invoice_ids.payment_state', 'deposit_invoice_id.payment_state', 'final_invoice_id.payment_state')
     def _compute_invoiced(self):
         for booking in self:
-            booking.invoiced = any(invoice.payment_state == 'paid' for invoice in booking.invoice_ids)
+            invoices = booking.invoice_ids | booking.deposit_invoice_id | booking.final_invoice_id
+            booking.invoiced = any(invoice.payment_state == 'paid' for invoice in invoices)
 
     @api.depends('session_ids')
     def _compute_session_count(self):
         for booking in self:
             booking.session_count = len(booking.session_ids)
 
-    @api.constrains('start_datetime', 'end_datetime')
+    @api.constrains('start_datetime', 'end_datetime', 'room_id', 'status')
     def _check_dates(self):
         for booking in self:
             if booking.start_datetime >= booking.end_datetime:
                 raise ValidationError(_('End time must be after start time'))
-            
-            # Check for conflicts with other bookings
-            if booking.status in ['confirmed', 'in_session']:
-                conflicts = self.search([
-                    ('room_id', '=', booking.room_id.id),
-                    ('status', 'in', ['confirmed', 'in_session']),
-                    ('id', '!=', booking.id),
-                    '|',
-                    '&', ('start_datetime', '<', booking.end_datetime), 
-                         ('end_datetime', '>', booking.start_datetime)
-                ])
-                if conflicts:
-                    raise ValidationError(_('This room is already booked for the selected time period'))
+        # Normally redundant with the exclusion constraint; one query for the whole batch
+        blocking = self.filtered(lambda booking: booking.status in ROOM_BLOCKING_STATUSES)
+        if not blocking:
+            return
+        self.flush_model(['room_id', 'status', 'start_datetime', 'end_datetime'])
+        self.env.cr.execute(
+            """
+            SELECT 1
+              FROM studio_booking booking
+              JOIN studio_booking other
+                ON other.room_id = booking.room_id
+               AND other.id != booking.id
+               AND other.status IN %(statuses)s
+               AND other.end_datetime > other.start_datetime
+               AND tsrange(other.start_datetime, other.end_datetime, '[)')
+                   && tsrange(booking.start_datetime, booking.end_datetime, '[)')
+             WHERE booking.id = ANY(%(ids)s)
+             LIMIT 1
+            """,
+            {'ids': blocking.ids, 'statuses': ROOM_BLOCKING_STATUSES},
+        )
+        if self.env.cr.fetchone():
+            raise ValidationError(_('This room is already booked for the selected time period'))
 
     @api.onchange('room_id', 'duration_hours')
     def _onchange_room_rates(self):
@@ -251,7 +375,8 @@ class StudioBooking(models.Model):
             'type': 'ir.actions.act_window',
             'res_model': 'account.move',
             'view_mode': 'tree,form',
-            'domain': [('studio_booking_id', '=', self.id)],
+            'domain': ['|', ('studio_booking_id', '=', self.id),
+                       ('id', 'in', (self.deposit_invoice_id | self.final_invoice_id).ids)],
         }
 
     def action_view_sessions(self):
@@ -264,6 +389,65 @@ class StudioBooking(models.Model):
             'domain': [('booking_id', '=', self.id)],
         }
 
+    @api.model
+    def _find_conflicts(self, room_id, intervals, engineer_id=None):
+        """Return {occurrence index: bookings} for intervals clashing with existing bookings.
+
+        All candidate ``(start, end)`` intervals are checked in one query by
+        unnesting them and joining on tsrange overlap, for the room and, when
+        given, the engineer.
+        """
+        if not intervals:
+            return {}
+        self.flush_model(['room_id', 'engineer_id', 'status', 'start_datetime', 'end_datetime'])
+        self.env.cr.execute(
+            """
+            SELECT occurrence.idx - 1, booking.id
+              FROM unnest(%(starts)s::timestamp[], %(ends)s::timestamp[])
+                   WITH ORDINALITY AS occurrence(start_at, end_at, idx)
+              JOIN studio_booking booking
+                ON (booking.room_id = %(room_id)s OR booking.engineer_id = %(engineer_id)s)
+               AND booking.status IN %(statuses)s
+               AND booking.end_datetime > booking.start_datetime
+               AND tsrange(booking.start_datetime, booking.end_datetime, '[)')
+                   && tsrange(occurrence.start_at, occurrence.end_at, '[)')
+          ORDER BY occurrence.idx, booking.start_datetime
+            """,
+            {
+                'starts': [start for start, _end in intervals],
+                'ends': [end for _start, end in intervals],
+                'room_id': room_id,
+                'engineer_id': engineer_id or None,
+                'statuses': ROOM_BLOCKING_STATUSES,
+            },
+        )
+        conflicts = {}
+        for index, booking_id in self.env.cr.fetchall():
+            conflicts.setdefault(index, self.browse())
+            conflicts[index] |= self.browse(booking_id)
+        return conflicts
+
+    def _create_consolidated_deposit_invoice(self):
+        """Create one deposit invoice covering every booking in ``self``"""
+        bookings = self.filtered(lambda booking: booking.deposit_required and booking.deposit_amount)
+        if not bookings:
+            return self.env['account.move']
+        if len(bookings.client_id) > 1:
+            raise ValidationError(_('A consolidated deposit invoice needs bookings for a single client.'))
+        invoice = self.env['account.move'].create({
+            'partner_id': bookings.client_id.id,
+            'move_type': 'out_invoice',
+            'studio_booking_id': bookings[0].id,
+            'invoice_origin': bookings[0].block_reference or ', '.join(bookings.mapped('name')),
+            'invoice_line_ids': [(0, 0, {
+                'name': f'Deposit for Studio Booking {booking.name}',
+                'quantity': 1,
+                'price_unit': booking.deposit_amount,
+            }) for booking in bookings],
+        })
+        bookings.write({'deposit_invoice_id': invoice.id})
+        return invoice
+
     def _create_deposit_invoice(self):
         """Create deposit invoice"""
         invoice_vals = {
@@ -277,6 +461,7 @@ class StudioBooking(models.Model):
             })]
         }
         invoice = self.env['account.move'].create(invoice_vals)
+        self.deposit_invoice_id = invoice
         return {
             'name': _('Deposit Invoice'),
             'type': 'ir.actions.act_window',
@@ -287,53 +472,142 @@ class StudioBooking(models.Model):
 
     def _create_final_invoice(self):
         """Create final invoice"""
-        invoice_vals = {
-            'partner_id': self.client_id.id,
-            'move_type': 'out_invoice',
-            'studio_booking_id': self.id,
-            'invoice_line_ids': [
-                (0, 0, {
-                    'name': f'Studio Room {self.room_id.name} - {self.duration_hours}h',
-                    'quantity': 1,
-                    'price_unit': self.room_rate,
-                }),
-            ]
+        invoice = self._create_final_invoices(post=False) or self.final_invoice_id
+        return {
+            'name': _('Final Invoice'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'account.move',
+            'res_id': invoice[:1].id,
+            'view_mode': 'form',
         }
-        
-        # Add engineer line if applicable
+
+    def _prepare_final_invoice_line_vals(self, prefix=''):
+        """Invoice line commands for the room, engineer and equipment of one booking"""
+        self.ensure_one()
+        lines = [(0, 0, {
+            'name': f'{prefix}Studio Room {self.room_id.name} - {self.duration_hours}h',
+            'quantity': 1,
+            'price_unit': self.room_rate,
+        })]
         if self.engineer_rate > 0:
-            invoice_vals['invoice_line_ids'].append((0, 0, {
-                'name': f'Engineer {self.engineer_id.name} - {self.duration_hours}h',
+            lines.append((0, 0, {
+                'name': f'{prefix}Engineer {self.engineer_id.name} - {self.duration_hours}h',
                 'quantity': 1,
                 'price_unit': self.engineer_rate,
             }))
-        
-        # Add equipment lines
         if self.equipment_cost > 0:
-            invoice_vals['invoice_line_ids'].append((0, 0, {
-                'name': 'Additional Equipment',
+            lines.append((0, 0, {
+                'name': f'{prefix}Additional Equipment',
                 'quantity': 1,
                 'price_unit': self.equipment_cost,
             }))
-        
-        invoice = self.env['account.move'].create(invoice_vals)
+        if self.deposit_invoice_id.state == 'posted' and self.deposit_amount:
+            lines.append((0, 0, {
+                'name': f'{prefix}Deposit invoiced on {self.deposit_invoice_id.name}',
+                'quantity': 1,
+                'price_unit': -self.deposit_amount,
+            }))
+        return lines
+
+    def _create_final_invoices(self, post=False):
+        """Create one final invoice per client/currency for the bookings in ``self``.
+
+        All invoices are built in memory and created with a single
+        ``account.move.create`` call, then optionally posted together.
+        Bookings whose final invoice exists and is not cancelled are skipped.
+        """
+        bookings = self.filtered(
+            lambda booking: not booking.final_invoice_id or booking.final_invoice_id.state == 'cancel'
+        )
+        groups = defaultdict(lambda: self.browse())
+        for booking in bookings.sorted('start_datetime'):
+            groups[(booking.client_id, booking.currency_id)] |= booking
+
+        vals_list = []
+        for (client, currency), group in groups.items():
+            single = len(group) == 1
+            vals = {
+                'partner_id': client.id,
+                'move_type': 'out_invoice',
+                'studio_booking_id': group.id if single else False,
+                'invoice_origin': ', '.join(group.mapped('name')),
+                'invoice_line_ids': [
+                    line
+                    for booking in group
+                    for line in booking._prepare_final_invoice_line_vals('' if single else f'{booking.name}: ')
+                ],
+            }
+            if currency:
+                vals['currency_id'] = currency.id
+            vals_list.append(vals)
+
+        invoices = self.env['account.move'].create(vals_list)
+        for invoice, group in zip(invoices, groups.values()):
+            group.write({'final_invoice_id': invoice.id})
+        if post and invoices:
+            invoices.action_post()
+        return invoices
+
+    @api.model
+    def _get_uninvoiced_domain(self):
+        return [
+            ('status', '=', 'completed'),
+            '|', ('final_invoice_id', '=', False), ('final_invoice_id.state', '=', 'cancel'),
+        ]
+
+    def action_batch_invoice(self):
+        """Invoice the selected completed bookings, grouped per client"""
+        bookings = self.filtered_domain(self._get_uninvoiced_domain())
+        invoices = bookings._create_final_invoices(post=True)
         return {
-            'name': _('Final Invoice'),
+            'name': _('Studio Invoices'),
             'type': 'ir.actions.act_window',
             'res_model': 'account.move',
-            'res_id': invoice.id,
-            'view_mode': 'form',
+            'view_mode': 'tree,form',
+            'domain': [('id', 'in', invoices.ids)],
         }
 
+    @api.model
+    def _cron_batch_invoice(self):
+        """Month-end run: invoice every completed booking without a final invoice"""
+        bookings = self.search(self._get_uninvoiced_domain())
+        bookings._create_final_invoices(post=True)
+
     def _schedule_reminders(self):
-        """Schedule email/SMS reminders"""
-        # This would integrate with email templates and optional SMS
-        # For now, just log the activity
-        self.activity_schedule(
-            'mail.mail_activity_data_todo',
-            date_deadline=self.start_datetime.date() - timedelta(days=1),
-            summary='Send 24h booking reminder',
-        )
+        """Queue the 24h and 2h reminders; the reminder cron sends them when due"""
+        self.write({'reminder_24h_sent': False, 'reminder_2h_sent': False})
+
+    @api.model
+    def _cron_send_reminders(self, batch_size=REMINDER_BATCH_SIZE):
+        """Send due booking reminders from the next_reminder_at queue.
+
+        Bookings already closer than two hours to their start only get the 2h
+        reminder; sessions that have started are dropped from the queue.
+        """
+        now = fields.Datetime.now()
+        due = self.search([('next_reminder_at', '<=', now)], order='next_reminder_at', limit=batch_size)
+        if not due:
+            return
+
+        started = due.filtered(lambda booking: booking.start_datetime <= now)
+        pending = due - started
+        last_call = pending.filtered(lambda booking: booking.start_datetime - now <= REMINDER_2H_OFFSET)
+        day_before = pending - last_call
+
+        template_24h = self.env.ref('label_studio_publishing.mail_template_studio_booking_reminder_24h',
+                                    raise_if_not_found=False)
+        template_2h = self.env.ref('label_studio_publishing.mail_template_studio_booking_reminder_2h',
+                                   raise_if_not_found=False)
+        if template_24h and day_before:
+            template_24h.send_mail_batch(day_before.ids)
+        if template_2h and last_call:
+            template_2h.send_mail_batch(last_call.ids)
+
+        day_before.write({'reminder_24h_sent': True})
+        (last_call | started).write({'reminder_24h_sent': True, 'reminder_2h_sent': True})
+
+        if len(due) == batch_size:
+            self.env.ref('label_studio_publishing.cron_studio_booking_reminders')._trigger()
 
 
 class AccountMove(models.Model):
@@ -345,3 +619,15 @@ class AccountMove(models.Model):
         ondelete='set null',
         help='Booking that generated this invoice.'
     )
+    studio_deposit_booking_ids = fields.One2many(
+        'studio.booking',
+        'deposit_invoice_id',
+        string='Deposit Studio Bookings',
+        help='Bookings whose deposit this invoice covers.'
+    )
+    studio_final_booking_ids = fields.One2many(
+        'studio.booking',
+        'final_invoice_id',
+        string='Invoiced Studio Bookings',
+        help='Completed bookings billed by this invoice.'
+    )
@@ -1,8 +1,22 @@
 # -*- coding: utf-8 -*-
 
+from datetime import timedelta
+
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
 
+# Booking statuses that occupy a room for utilization purposes
+UTILIZATION_STATUSES = ('confirmed', 'in_session', 'completed')
+# Booking statuses that block the room for other bookings
+ROOM_BLOCKING_STATUSES = ('confirmed', 'in_session')
+# Bookable hours per day for rooms without a working-hours calendar
+DEFAULT_ROOM_HOURS_PER_DAY = 8
+UTILIZATION_WINDOW_DAYS = 30
+UTILIZATION_BUCKETS = {
+    'hour': '1 hour',
+    'day': '1 day',
+}
+
 
 class StudioRoom(models.Model):
     _name = 'studio.room'
@@ -91,64 +105,72 @@ class StudioRoom(models.Model):
 
     @api.depends()
     def _compute_booking_stats(self):
+        stats = {
+            room.id: (count, revenue)
+            for room, count, revenue in self.env['studio.booking']._read_group(
+                [('room_id', 'in', [room_id for room_id in self.ids if room_id]),
+                 ('status', 'in', list(UTILIZATION_STATUSES))],
+                ['room_id'],
+                ['__count', 'total_amount:sum'],
+            )
+        }
         for room in self:
-            bookings = self.env['studio.booking'].search([
-                ('room_id', '=', room.id),
-                ('status', 'in', ['confirmed', 'in_session', 'completed'])
-            ])
-            room.booking_count = len(bookings)
-            room.total_revenue = sum(bookings.mapped('total_amount'))
+            room.booking_count, room.total_revenue = stats.get(room.id, (0, 0.0))
 
     @api.depends()
     def _compute_utilization_rate(self):
-        """Calculate utilization rate for last 30 days"""
+        """Calculate utilization rate for the last 30 days"""
+        date_to = fields.Datetime.now()
+        date_from = date_to - timedelta(days=UTILIZATION_WINDOW_DAYS)
+        utilization = self._get_utilization(date_from, date_to)
         for room in self:
-            # Simplified calculation - in production, use proper date ranges
-            total_hours = 30 * 8  # 30 days * 8 hours per day
-            booked_hours = 0
-            
-            # Get bookings from last 30 days
-            from datetime import datetime, timedelta
-            last_30_days = datetime.now() - timedelta(days=30)
-            
-            bookings = self.env['studio.booking'].search([
-                ('room_id', '=', room.id),
-                ('start_datetime', '>=', last_30_days),
-                ('status', 'in', ['confirmed', 'in_session', 'completed'])
-            ])
-            
-            for booking in bookings:
-                if booking.start_datetime and booking.end_datetime:
-                    duration = booking.end_datetime - booking.start_datetime
-                    booked_hours += duration.total_seconds() / 3600
-            
-            room.utilization_rate = (booked_hours / total_hours * 100) if total_hours > 0 else 0
+            room.utilization_rate = utilization[room.id]['utilization_rate']
 
     @api.depends()
     def _compute_current_booking(self):
         """Find current active booking"""
+        now = fields.Datetime.now()
+        current = self._get_first_booking_per_room(
+            "status = 'in_session' AND start_datetime <= %(now)s AND end_datetime >= %(now)s",
+            'start_datetime DESC',
+            now,
+        )
         for room in self:
-            current_booking = self.env['studio.booking'].search([
-                ('room_id', '=', room.id),
-                ('status', '=', 'in_session'),
-                ('start_datetime', '<=', fields.Datetime.now()),
-                ('end_datetime', '>=', fields.Datetime.now())
-            ], limit=1)
-            
-            room.current_booking_id = current_booking.id if current_booking else False
-            room.is_occupied = bool(current_booking)
+            room.current_booking_id = current.get(room.id, False)
+            room.is_occupied = room.id in current
 
     @api.depends()
     def _compute_next_booking(self):
         """Find next upcoming booking"""
+        upcoming = self._get_first_booking_per_room(
+            "status IN ('confirmed', 'pending') AND start_datetime > %(now)s",
+            'start_datetime ASC',
+            fields.Datetime.now(),
+        )
         for room in self:
-            next_booking = self.env['studio.booking'].search([
-                ('room_id', '=', room.id),
-                ('status', 'in', ['confirmed', 'pending']),
-                ('start_datetime', '>', fields.Datetime.now())
-            ], order='start_datetime asc', limit=1)
-            
-            room.next_booking_id = next_booking.id if next_booking else False
+            room.next_booking_id = upcoming.get(room.id, False)
+
+    def _get_first_booking_per_room(self, condition, order, now):
+        """Return {room_id: booking_id} for the first matching booking of each room.
+
+        ``condition`` and ``order`` are fixed SQL fragments from the computes
+        above; one DISTINCT ON query serves the whole recordset.
+        """
+        room_ids = [room_id for room_id in self.ids if room_id]
+        if not room_ids:
+            return {}
+        self.env['studio.booking'].flush_model(['room_id', 'status', 'start_datetime', 'end_datetime'])
+        self.env.cr.execute(
+            f"""
+            SELECT DISTINCT ON (room_id) room_id, id
+              FROM studio_booking
+             WHERE room_id = ANY(%(room_ids)s)
+               AND {condition}
+          ORDER BY room_id, {order}, id
+            """,
+            {'room_ids': room_ids, 'now': now},
+        )
+        return dict(self.env.cr.fetchall())
 
     def action_view_bookings(self):
         """View all bookings for this room"""
@@ -189,19 +211,144 @@ class StudioRoom(models.Model):
             'target': 'new'
         }
 
+    # ------------------------------------------------------------------
+    # Utilization engine
+    # ------------------------------------------------------------------
+
+    def _get_booked_hours(self, date_from, date_to, bucket=None):
+        """Return booked hours per room inside [date_from, date_to).
+
+        Bookings are clipped to the window with tsrange intersection, so a
+        booking straddling a boundary only counts its overlapping part. With
+        ``bucket`` set to 'hour' or 'day' the hours are further split per
+        bucket for heatmaps and the result is keyed by (room_id, bucket_start);
+        otherwise it is keyed by room_id.
+        """
+        room_ids = [room_id for room_id in self.ids if room_id]
+        if not room_ids:
+            return {}
+        if bucket and bucket not in UTILIZATION_BUCKETS:
+            raise ValidationError(_('Unsupported utilization bucket: %s') % bucket)
+        self.env['studio.booking'].flush_model(['room_id', 'status', 'start_datetime', 'end_datetime'])
+        params = {
+            'room_ids': room_ids,
+            'statuses': list(UTILIZATION_STATUSES),
+            'date_from': fields.Datetime.to_datetime(date_from),
+            'date_to': fields.Datetime.to_datetime(date_to),
+        }
+        if bucket:
+            params.update(unit=bucket, step=UTILIZATION_BUCKETS[bucket])
+            buckets = """
+                SELECT slot AS bucket_start, tsrange(slot, slot + %(step)s::interval, '[)') AS span
+                  FROM generate_series(date_trunc(%(unit)s, %(date_from)s::timestamp),
+                                       %(date_to)s::timestamp, %(step)s::interval) AS slot
+                 WHERE slot < %(date_to)s
+            """
+        else:
+            buckets = "SELECT NULL::timestamp AS bucket_start, tsrange(NULL, NULL) AS span"
+        self.env.cr.execute(
+            f"""
+            WITH window_range AS (
+                SELECT tsrange(%(date_from)s, %(date_to)s, '[)') AS span
+            ),
+            buckets AS ({buckets}),
+            clipped AS (
+                SELECT booking.room_id, buckets.bucket_start,
+                       tsrange(booking.start_datetime, booking.end_datetime, '[)')
+                           * window_range.span * buckets.span AS span
+                  FROM studio_booking booking
+                  JOIN window_range ON TRUE
+                  JOIN buckets
+                    ON tsrange(booking.start_datetime, booking.end_datetime, '[)') && buckets.span
+                 WHERE booking.room_id = ANY(%(room_ids)s)
+                   AND booking.status = ANY(%(statuses)s)
+                   AND booking.start_datetime < %(date_to)s
+                   AND booking.end_datetime > %(date_from)s
+                   AND booking.end_datetime > booking.start_datetime
+            )
+            SELECT room_id, bucket_start,
+                   SUM(EXTRACT(EPOCH FROM upper(span) - lower(span))) / 3600.0
+              FROM clipped
+             WHERE NOT isempty(span)
+          GROUP BY room_id, bucket_start
+            """,
+            params,
+        )
+        if bucket:
+            return {(room_id, bucket_start): float(hours) for room_id, bucket_start, hours in self.env.cr.fetchall()}
+        return {room_id: float(hours) for room_id, _bucket, hours in self.env.cr.fetchall()}
+
+    def _get_available_hours(self, date_from, date_to):
+        """Return bookable hours per room, from its working-hours calendar when set."""
+        date_from = fields.Datetime.to_datetime(date_from)
+        date_to = fields.Datetime.to_datetime(date_to)
+        days = max((date_to - date_from).total_seconds() / 86400.0, 0.0)
+        available = {}
+        for room in self:
+            if room.calendar_id:
+                available[room.id] = room.calendar_id.get_work_hours_count(
+                    date_from, date_to, compute_leaves=False
+                )
+            else:
+                available[room.id] = days * DEFAULT_ROOM_HOURS_PER_DAY
+        return available
+
+    def _get_utilization(self, date_from, date_to):
+        """Return booked hours, available hours and utilization rate per room."""
+        booked = self._get_booked_hours(date_from, date_to)
+        available = self._get_available_hours(date_from, date_to)
+        result = {}
+        for room in self:
+            booked_hours = booked.get(room.id, 0.0)
+            available_hours = available.get(room.id, 0.0)
+            result[room.id] = {
+                'booked_hours': booked_hours,
+                'available_hours': available_hours,
+                'utilization_rate': (booked_hours / available_hours * 100) if available_hours else 0.0,
+            }
+        return result
+
     def check_availability(self, start_datetime, end_datetime):
         """Check if room is available for given time slot"""
         self.ensure_one()
-        
-        conflicting_bookings = self.env['studio.booking'].search([
-            ('room_id', '=', self.id),
-            ('status', 'in', ['confirmed', 'in_session']),
-            '|',
-            '&', ('start_datetime', '<=', start_datetime), ('end_datetime', '>', start_datetime),
-            '&', ('start_datetime', '<', end_datetime), ('end_datetime', '>=', end_datetime),
-        ])
-        
-        return len(conflicting_bookings) == 0
+        return self in self._get_free_rooms(start_datetime, end_datetime)
+
+    @api.model
+    def get_available_rooms(self, start_datetime, end_datetime):
+        """Return the active rooms that are free for the whole slot"""
+        return self.search([('active', '=', True), ('maintenance_mode', '=', False)])._get_free_rooms(
+            start_datetime, end_datetime
+        )
+
+    def _get_free_rooms(self, start_datetime, end_datetime):
+        """Filter ``self`` down to rooms without a blocking booking overlapping the slot.
+
+        The overlap test uses the same tsrange expression as the booking
+        exclusion constraint, so it is answered from that GiST index for all
+        rooms at once, containment included.
+        """
+        if not self.ids:
+            return self
+        self.env['studio.booking'].flush_model(['room_id', 'status', 'start_datetime', 'end_datetime'])
+        self.env.cr.execute(
+            """
+            SELECT DISTINCT booking.room_id
+              FROM studio_booking booking
+             WHERE booking.room_id = ANY(%(room_ids)s)
+               AND booking.status IN %(statuses)s
+               AND booking.end_datetime > booking.start_datetime
+               AND tsrange(booking.start_datetime, booking.end_datetime, '[)')
+                   && tsrange(%(start)s, %(end)s, '[)')
+            """,
+            {
+                'room_ids': self.ids,
+                'statuses': ROOM_BLOCKING_STATUSES,
+                'start': fields.Datetime.to_datetime(start_datetime),
+                'end': fields.Datetime.to_datetime(end_datetime),
+            },
+        )
+        busy_ids = {row[0] for row in self.env.cr.fetchall()}
+        return self.filtered(lambda room: room.id not in busy_ids)
 
     @api.constrains('hourly_rate', 'day_rate')
     def _check_rates(self):
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+
+import math
+import uuid
+from datetime import datetime, time, timedelta
+
+import pytz
+
+from odoo import api, fields, models, tools, _
+from odoo.exceptions import UserError
+
+from .studio_room import ROOM_BLOCKING_STATUSES
+
+# Slot start times are aligned to this grid
+SLOT_STEP_MINUTES = 30
+SLOT_DEFAULT_LIMIT = 5
+SLOT_MAX_WINDOW_DAYS = 62
+# Bumped whenever bookings or sessions are deleted, which MAX(write_date) cannot see
+SCHEDULE_DELETION_PARAM = 'label_studio_publishing.studio_schedule_deletion_token'
+
+
+def _merge_intervals(intervals):
+    """Merge overlapping or touching (start, end) pairs into a sorted list."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _subtract_intervals(intervals, busy):
+    """Remove merged ``busy`` intervals from merged ``intervals`` in one sweep."""
+    result = []
+    index = 0
+    for start, end in intervals:
+        cursor = start
+        while index < len(busy) and busy[index][1] <= cursor:
+            index += 1
+        probe = index
+        while probe < len(busy) and busy[probe][0] < end:
+            if busy[probe][0] > cursor:
+                result.append((cursor, busy[probe][0]))
+            cursor = max(cursor, busy[probe][1])
+            probe += 1
+        if cursor < end:
+            result.append((cursor, end))
+    return result
+
+
+def _intersect_intervals(left, right):
+    """Intersect two merged, sorted interval lists with a two-pointer sweep."""
+    result = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        start = max(left[i][0], right[j][0])
+        end = min(left[i][1], right[j][1])
+        if start < end:
+            result.append((start, end))
+        if left[i][1] < right[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+class StudioSlotFinder(models.AbstractModel):
+    _name = 'studio.slot.finder'
+    _description = 'Studio Free Slot Finder'
+
+    @api.model
+    def find_slots(self, duration_hours=None, date_from=None, date_to=None, room_id=None,
+                   engineer_id=None, package_id=None, limit=SLOT_DEFAULT_LIMIT):
+        """Return the earliest feasible slots as a list of dicts.
+
+        Room opening hours come from the room's working-hours calendar (or the
+        company calendar), and are reduced by blocking bookings and scheduled
+        sessions. When an engineer is requested, or the package includes one,
+        each slot also needs a free engineer. Busy and open intervals are
+        cached per day, so repeated calendar lookups cost no queries.
+        """
+        package = self.env['studio.package'].browse(package_id) if package_id else self.env['studio.package']
+        duration_hours = float(duration_hours or package.duration_hours or 0.0)
+        if duration_hours <= 0:
+            raise UserError(_('Please provide a positive duration.'))
+
+        window_start = fields.Datetime.to_datetime(date_from) or fields.Datetime.now()
+        window_end = fields.Datetime.to_datetime(date_to) or window_start + timedelta(days=14)
+        window_start = max(window_start, fields.Datetime.now().replace(second=0, microsecond=0))
+        if window_end <= window_start:
+            return []
+        if (window_end - window_start).days > SLOT_MAX_WINDOW_DAYS:
+            raise UserError(_('The search window cannot exceed %s days.') % SLOT_MAX_WINDOW_DAYS)
+
+        room_domain = [('active', '=', True), ('maintenance_mode', '=', False)]
+        if room_id or package.room_id:
+            room_domain.append(('id', '=', room_id or package.room_id.id))
+        rooms = self.env['studio.room'].search(room_domain)
+
+        if engineer_id:
+            engineers = self.env['res.partner'].browse(engineer_id)
+        elif package.engineer_included:
+            engineers = self.env['res.partner'].search([('is_engineer', '=', True)])
+        else:
+            engineers = self.env['res.partner']
+
+        duration = timedelta(hours=duration_hours)
+        version = self._get_schedule_version()
+        days = self._get_window_days(window_start, window_end)
+        busy_by_day = [self._get_day_busy(day, version) for day in days]
+        window = [(window_start, window_end)]
+
+        def busy_for(key):
+            return _merge_intervals(
+                interval for day_busy in busy_by_day for interval in day_busy.get(key, ())
+            )
+
+        engineer_free = [
+            (engineer, _subtract_intervals(window, busy_for(('engineer', engineer.id))))
+            for engineer in engineers
+        ]
+
+        slots = []
+        for room in rooms:
+            calendar = room.calendar_id or self.env.company.resource_calendar_id
+            open_intervals = _merge_intervals(
+                interval
+                for day in days
+                for interval in self._get_day_open_intervals(calendar.id, day, calendar.write_date)
+            )
+            room_free = _subtract_intervals(_intersect_intervals(open_intervals, window), busy_for(('room', room.id)))
+            if engineers:
+                for engineer, free in engineer_free:
+                    slots.extend(self._collect_slots(_intersect_intervals(room_free, free), duration, limit, room, engineer))
+            else:
+                slots.extend(self._collect_slots(room_free, duration, limit, room, engineers))
+
+        slots.sort(key=lambda slot: (slot['start'], slot['room_id'], slot['engineer_id'] or 0))
+        return slots[:limit]
+
+    @api.model
+    def _collect_slots(self, free_intervals, duration, limit, room, engineer):
+        step = timedelta(minutes=SLOT_STEP_MINUTES)
+        slots = []
+        for start, end in free_intervals:
+            # Align the first candidate start to the slot grid
+            offset = (start - datetime.combine(start.date(), time.min)).total_seconds()
+            candidate = datetime.combine(start.date(), time.min) + step * math.ceil(offset / step.total_seconds())
+            while candidate + duration <= end:
+                slots.append({
+                    'start': fields.Datetime.to_string(candidate),
+                    'end': fields.Datetime.to_string(candidate + duration),
+                    'room_id': room.id,
+                    'room_name': room.name,
+                    'engineer_id': engineer.id or False,
+                    'engineer_name': engineer.name or False,
+                })
+                if len(slots) >= limit:
+                    return slots
+                candidate += step
+        return slots
+
+    @api.model
+    def _get_window_days(self, window_start, window_end):
+        day = window_start.date()
+        days = []
+        while day <= window_end.date():
+            days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    @api.model
+    def _get_schedule_version(self):
+        """Token that changes whenever any booking or session is created, edited or deleted.
+
+        Creates and edits move the indexed MAX(write_date) of either table;
+        deletions bump the ``SCHEDULE_DELETION_PARAM`` token instead.
+        """
+        self.env['studio.booking'].flush_model()
+        self.env['studio.session'].flush_model()
+        self.env.cr.execute(
+            """
+            SELECT (SELECT MAX(write_date) FROM studio_booking),
+                   (SELECT MAX(write_date) FROM studio_session)
+            """
+        )
+        deletion_token = self.env['ir.config_parameter'].sudo().get_param(SCHEDULE_DELETION_PARAM)
+        return tuple(str(value) for value in self.env.cr.fetchone()) + (deletion_token or '',)
+
+    @api.model
+    def _bump_schedule_deletion_token(self):
+        """Invalidate cached busy intervals after bookings or sessions are deleted."""
+        self.env['ir.config_parameter'].sudo().set_param(SCHEDULE_DELETION_PARAM, uuid.uuid4().hex)
+
+    @tools.ormcache('day', 'version')
+    def _get_day_busy(self, day, version):
+        """Busy intervals per ('room' | 'engineer', id) for one UTC day."""
+        day_start = datetime.combine(day, time.min)
+        day_end = day_start + timedelta(days=1)
+        self.env.cr.execute(
+            """
+            SELECT room_id, engineer_id,
+                   GREATEST(start_datetime, %(day_start)s), LEAST(end_datetime, %(day_end)s)
+              FROM studio_booking
+             WHERE status IN %(statuses)s
+               AND start_datetime < %(day_end)s
+               AND end_datetime > %(day_start)s
+            UNION ALL
+            SELECT room_id, engineer_id,
+                   GREATEST(start_time, %(day_start)s), LEAST(end_time, %(day_end)s)
+              FROM studio_session
+             WHERE active
+               AND state IN ('scheduled', 'in_progress')
+               AND start_time < %(day_end)s
+               AND end_time > %(day_start)s
+            """,
+            {'day_start': day_start, 'day_end': day_end, 'statuses': ROOM_BLOCKING_STATUSES},
+        )
+        busy = {}
+        for room_id, engineer_id, start, end in self.env.cr.fetchall():
+            if room_id:
+                busy.setdefault(('room', room_id), []).append((start, end))
+            if engineer_id:
+                busy.setdefault(('engineer', engineer_id), []).append((start, end))
+        return {key: tuple(_merge_intervals(intervals)) for key, intervals in busy.items()}
+
+    @tools.ormcache('calendar_id', 'day', 'calendar_version')
+    def _get_day_open_intervals(self, calendar_id, day, calendar_version):
+        """Working intervals of a calendar for one UTC day, as naive UTC datetimes."""
+        day_start = pytz.utc.localize(datetime.combine(day, time.min))
+        day_end = day_start + timedelta(days=1)
+        if not calendar_id:
+            return ((day_start.replace(tzinfo=None), day_end.replace(tzinfo=None)),)
+        calendar = self.env['resource.calendar'].browse(calendar_id)
+        intervals = calendar._work_intervals_batch(day_start, day_end)[False]
+        return tuple(_merge_intervals(
+            (start.astimezone(pytz.utc).replace(tzinfo=None), stop.astimezone(pytz.utc).replace(tzinfo=None))
+            for start, stop, _records in intervals
+        ))
@@ -2,9 +2,11 @@
 
 import io
 from collections import defaultdict
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from odoo import api, models
+from odoo import api, fields, models
+
+from ..models.studio_room import UTILIZATION_WINDOW_DAYS
 
 
 class ReportRoyaltyStatement(models.AbstractModel):
@@ -15,35 +17,58 @@ class ReportRoyaltyStatement(models.AbstractModel):
     def _get_report_values(self, docids, data=None):
         """Generate report values for royalty statement"""
         statements = self.env['royalty.statement'].browse(docids)
-        
+
+        # Roll the stored statement summary up per recording/work; the raw
+        # usage lines are never loaded while rendering.
+        summary = statements._get_summary()
+        recording_totals = defaultdict(list)
+        groups = self.env['royalty.statement.summary']._read_group(
+            [('id', 'in', summary.ids)],
+            ['statement_id', 'recording_id', 'work_id'],
+            ['units:sum', 'gross_amount:sum', 'fees:sum', 'net_amount:sum', 'line_count:sum'],
+        )
+        for statement, recording, work, units, gross, fees, net, count in groups:
+            recording_totals[statement.id].append({
+                'recording': recording,
+                'work': work,
+                'units': units,
+                'gross_amount': gross,
+                'fees': fees,
+                'net_amount': net,
+                'line_count': count,
+            })
+
+        # Publishing shares of the matched work income, allocated per work
+        # with one query for every statement's splits.
+        split_allocations = defaultdict(list)
+        allocations = statements._get_split_allocations()
+        partners = self.env['res.partner'].browse({row['partner_id'] for row in allocations})
+        works = self.env['music.work'].browse({row['work_id'] for row in allocations})
+        partners.fetch(['display_name'])
+        works.fetch(['display_name'])
+        for row in allocations:
+            split_allocations[row['key']].append({
+                'work': works.browse(row['work_id']),
+                'partner': partners.browse(row['partner_id']),
+                'share_type': row['share_type'],
+                'amount': row['amount'],
+                'currency': self.env['res.currency'].browse(row['currency_id']),
+            })
+
         report_data = []
         for statement in statements:
-            # Calculate totals by recording/work
-            recording_totals = defaultdict(lambda: {
-                'units': 0,
-                'gross_amount': 0.0,
-                'net_amount': 0.0,
-                'lines': []
-            })
-            
-            for line in statement.usage_line_ids:
-                key = line.recording_id.id if line.recording_id else f"unmatched_{line.id}"
-                recording_totals[key]['units'] += line.units
-                recording_totals[key]['gross_amount'] += line.gross_amount
-                recording_totals[key]['net_amount'] += line.net_amount
-                recording_totals[key]['lines'].append(line)
-            
-            # Prepare statement data
+            rows = sorted(recording_totals[statement.id], key=lambda row: row['net_amount'], reverse=True)
             statement_data = {
                 'statement': statement,
-                'recording_totals': recording_totals,
-                'total_units': sum(rt['units'] for rt in recording_totals.values()),
-                'total_gross': sum(rt['gross_amount'] for rt in recording_totals.values()),
-                'total_net': sum(rt['net_amount'] for rt in recording_totals.values()),
+                'recording_totals': rows,
+                'split_allocations': split_allocations[statement.id],
+                'total_units': sum(row['units'] for row in rows),
+                'total_gross': sum(row['gross_amount'] for row in rows),
+                'total_net': sum(row['net_amount'] for row in rows),
                 'period_label': f"{statement.period_start.strftime('%b %Y')} - {statement.period_end.strftime('%b %Y')}",
             }
             report_data.append(statement_data)
-        
+
         return {
             'doc_ids': docids,
             'doc_model': 'royalty.statement',
@@ -280,53 +305,60 @@ class ReportStudioUtilization(models.AbstractModel):
     @api.model
     def _get_report_values(self, docids, data=None):
         """Generate studio utilization report"""
-        date_from = data.get('date_from') if data else None
-        date_to = data.get('date_to') if data else None
-        
-        # Get all rooms
+        data = data or {}
+        date_to = fields.Date.to_date(data.get('date_to')) or fields.Date.context_today(self)
+        date_from = fields.Date.to_date(data.get('date_from')) or date_to - timedelta(days=UTILIZATION_WINDOW_DAYS - 1)
+        bucket = data.get('bucket')
+        # Whole days: the window runs from midnight of date_from to midnight after date_to
+        window_start = datetime.combine(date_from, datetime.min.time())
+        window_end = datetime.combine(date_to + timedelta(days=1), datetime.min.time())
+
         rooms = self.env['studio.room'].search([('active', '=', True)])
-        
+        utilization = rooms._get_utilization(window_start, window_end)
+        heatmap = rooms._get_booked_hours(window_start, window_end, bucket=bucket) if bucket else {}
+
+        # Booking counts and revenue for bookings starting in the window, in one grouped read
+        booking_stats = defaultdict(lambda: {'count': 0, 'revenue': 0.0, 'by_status': {}})
+        for room, status, count, revenue in self.env['studio.booking']._read_group(
+            [
+                ('room_id', 'in', rooms.ids),
+                ('start_datetime', '>=', window_start),
+                ('start_datetime', '<', window_end),
+            ],
+            ['room_id', 'status'],
+            ['__count', 'total_amount:sum'],
+        ):
+            stats = booking_stats[room.id]
+            stats['count'] += count
+            stats['by_status'][status] = count
+            if status != 'cancelled':
+                stats['revenue'] += revenue
+
         room_data = []
         for room in rooms:
-            # Get bookings in period
-            booking_domain = [('room_id', '=', room.id)]
-            if date_from:
-                booking_domain.append(('start_date', '>=', date_from))
-            if date_to:
-                booking_domain.append(('end_date', '<=', date_to))
-            
-            bookings = self.env['studio.booking'].search(booking_domain)
-            
-            # Calculate utilization
-            total_hours_available = room.available_hours or 24 * 7  # Default to 24/7
-            if date_from and date_to:
-                days_in_period = (date_to - date_from).days + 1
-                total_hours_available *= days_in_period
-            
-            booked_hours = sum(booking.duration for booking in bookings)
-            utilization_rate = (booked_hours / total_hours_available * 100) if total_hours_available else 0
-            
-            # Revenue stats
-            total_revenue = sum(booking.total_amount for booking in bookings.filtered(lambda b: b.state != 'cancelled'))
-            average_booking_value = total_revenue / len(bookings) if bookings else 0
-            
-            room_info = {
+            stats = booking_stats[room.id]
+            room_data.append({
                 'room': room,
-                'bookings_count': len(bookings),
-                'booked_hours': booked_hours,
-                'utilization_rate': utilization_rate,
-                'total_revenue': total_revenue,
-                'average_booking_value': average_booking_value,
-                'confirmed_bookings': bookings.filtered(lambda b: b.state == 'confirmed'),
-                'completed_bookings': bookings.filtered(lambda b: b.state == 'completed'),
-            }
-            room_data.append(room_info)
-        
+                'bookings_count': stats['count'],
+                'booked_hours': utilization[room.id]['booked_hours'],
+                'available_hours': utilization[room.id]['available_hours'],
+                'utilization_rate': utilization[room.id]['utilization_rate'],
+                'total_revenue': stats['revenue'],
+                'average_booking_value': stats['revenue'] / stats['count'] if stats['count'] else 0,
+                'confirmed_count': stats['by_status'].get('confirmed', 0),
+                'completed_count': stats['by_status'].get('completed', 0),
+                'heatmap': sorted(
+                    (bucket_start, hours)
+                    for (room_id, bucket_start), hours in heatmap.items()
+                    if room_id == room.id
+                ),
+            })
+
         # Overall statistics
         total_bookings = sum(rd['bookings_count'] for rd in room_data)
         total_revenue = sum(rd['total_revenue'] for rd in room_data)
         average_utilization = sum(rd['utilization_rate'] for rd in room_data) / len(room_data) if room_data else 0
-        
+
         return {
             'doc_ids': [],
             'doc_model': 'studio.room',
@@ -337,6 +369,7 @@ class ReportStudioUtilization(models.AbstractModel):
             'average_utilization': average_utilization,
             'date_from': date_from,
             'date_to': date_to,
+            'bucket': bucket,
             'company': self.env.company,
             'report_date': datetime.now(),
         }
@@ -349,77 +382,43 @@ class ReportDealSummary(models.AbstractModel):
     @api.model
     def _get_report_values(self, docids, data=None):
         """Generate deal portfolio summary report"""
-        # Active deals
-        active_deals = self.env['label.deal'].search([('state', '=', 'active')])
-        
+        active_deals = self.env['label.deal'].search([('status', '=', 'active')])
+        earnings, territory_performance = self._get_deal_earnings(active_deals)
+
+        recoup_balances = {
+            deal.id: debit - credit
+            for deal, debit, credit in self.env['royalty.recoup.ledger']._read_group(
+                [('deal_id', 'in', active_deals.ids)], ['deal_id'], ['debit_amount:sum', 'credit_amount:sum']
+            )
+        }
+
         # Deal statistics
         deal_stats = {
             'total_active': len(active_deals),
-            'total_advance': sum(deal.advance_amount for deal in active_deals),
-            'total_unrecouped': sum(deal.unrecouped_balance for deal in active_deals),
-            'artist_count': len(active_deals.mapped('artist_id')),
+            'total_advance': sum(active_deals.mapped('advance_amount')),
+            'total_unrecouped': sum(recoup_balances.values()),
+            'artist_count': len(active_deals.mapped('party_id')),
         }
-        
-        # Deal performance analysis
+
+        # Deal performance analysis, ranked in memory from the aggregated rows
+        today = datetime.now().date()
         deal_performance = []
         for deal in active_deals:
-            # Get related royalty data
-            usage_lines = self.env['royalty.usage.line'].search([
-                ('matched_state', 'in', ['auto_matched', 'manually_matched']),
-                '|',
-                ('recording_id.deal_id', '=', deal.id),
-                ('work_id.deal_id', '=', deal.id),
-            ])
-            
-            total_earnings = sum(line.net_amount for line in usage_lines)
-            recoupment_progress = (total_earnings / deal.advance_amount * 100) if deal.advance_amount else 0
-            
-            deal_info = {
+            deal_earnings = earnings.get(deal.id, {})
+            total_earnings = deal_earnings.get('earnings', 0.0)
+            deal_performance.append({
                 'deal': deal,
                 'total_earnings': total_earnings,
-                'recoupment_progress': recoupment_progress,
-                'months_since_signing': (datetime.now().date() - deal.signing_date).days / 30.44 if deal.signing_date else 0,
-                'recordings_count': len(deal.recording_ids),
-                'works_count': len(deal.work_ids),
-                'releases_count': len(deal.release_ids),
-            }
-            deal_performance.append(deal_info)
-        
+                'recoupment_progress': (total_earnings / deal.advance_amount * 100) if deal.advance_amount else 0,
+                'months_since_signing': (today - deal.signed_date).days / 30.44 if deal.signed_date else 0,
+                'recordings_count': deal_earnings.get('recordings', 0),
+                'works_count': deal_earnings.get('works', 0),
+                'unrecouped_balance': recoup_balances.get(deal.id, 0.0),
+            })
+
         # Sort by earnings
         deal_performance.sort(key=lambda x: x['total_earnings'], reverse=True)
-        
-        # Territory analysis
-        territory_stats = defaultdict(lambda: {
-            'earnings': 0.0,
-            'units': 0,
-            'deals_count': set(),
-        })
-        
-        for line in self.env['royalty.usage.line'].search([
-            ('matched_state', 'in', ['auto_matched', 'manually_matched']),
-            ('territory_code', '!=', False),
-        ]):
-            territory = line.territory_code
-            territory_stats[territory]['earnings'] += line.net_amount
-            territory_stats[territory]['units'] += line.units
-            
-            if line.recording_id and line.recording_id.deal_id:
-                territory_stats[territory]['deals_count'].add(line.recording_id.deal_id.id)
-            elif line.work_id and line.work_id.deal_id:
-                territory_stats[territory]['deals_count'].add(line.work_id.deal_id.id)
-        
-        # Convert to list
-        territory_performance = [
-            {
-                'territory': territory,
-                'earnings': stats['earnings'],
-                'units': stats['units'],
-                'deals_count': len(stats['deals_count']),
-            }
-            for territory, stats in territory_stats.items()
-        ]
-        territory_performance.sort(key=lambda x: x['earnings'], reverse=True)
-        
+
         return {
             'doc_ids': [],
             'doc_model': 'label.deal',
@@ -429,4 +428,77 @@ class ReportDealSummary(models.AbstractModel):
             'territory_performance': territory_performance[:15],  # Top 15
             'company': self.env.company,
             'report_date': datetime.now(),
-        }
\ No newline at end of file
+        }
+
+    @api.model
+    def _get_deal_earnings(self, deals):
+        """Return per-deal earnings and territory stats in a single query.
+
+        Usage lines are mapped to deals through the usage ownership index: a
+        line belongs to a deal when the deal party is a main artist or writer
+        on it and the usage period starts within the deal term.
+        """
+        self.env['royalty.usage.line'].flush_model()
+        self.env['royalty.usage.partner.rel'].flush_model()
+        self.env['label.deal'].flush_model(['party_id', 'term_start', 'term_end', 'status'])
+        self.env.cr.execute(
+            """
+            WITH matched_line AS (
+                SELECT id, recording_id, work_id, territory_code, units, net_amount
+                  FROM royalty_usage_line
+                 WHERE matched_state IN ('auto_matched', 'manually_matched')
+            ),
+            line_deal AS (
+                SELECT DISTINCT line.id AS line_id, deal.id AS deal_id
+                  FROM royalty_usage_partner_rel rel
+                  JOIN label_deal deal
+                    ON deal.party_id = rel.partner_id
+                   AND rel.period_start BETWEEN deal.term_start AND deal.term_end
+                  JOIN matched_line line ON line.id = rel.usage_line_id
+                 WHERE deal.id = ANY(%(deal_ids)s)
+                   AND rel.role IN ('main_artist', 'writer')
+            )
+            SELECT 'deal', ld.deal_id, NULL, SUM(line.net_amount), SUM(line.units),
+                   COUNT(DISTINCT line.recording_id), COUNT(DISTINCT line.work_id)
+              FROM line_deal ld
+              JOIN matched_line line ON line.id = ld.line_id
+          GROUP BY ld.deal_id
+            UNION ALL
+            SELECT 'territory', NULL, totals.territory_code, totals.net_amount, totals.units,
+                   COALESCE(deals.deal_count, 0), NULL
+              FROM (
+                    -- Each line summed once, however many deals it belongs to
+                    SELECT territory_code, SUM(net_amount) AS net_amount, SUM(units) AS units
+                      FROM matched_line
+                     WHERE territory_code IS NOT NULL
+                  GROUP BY territory_code
+                   ) totals
+         LEFT JOIN (
+                    SELECT line.territory_code, COUNT(DISTINCT ld.deal_id) AS deal_count
+                      FROM line_deal ld
+                      JOIN matched_line line ON line.id = ld.line_id
+                     WHERE line.territory_code IS NOT NULL
+                  GROUP BY line.territory_code
+                   ) deals ON deals.territory_code = totals.territory_code
+            """,
+            {'deal_ids': deals.ids},
+        )
+        earnings = {}
+        territory_performance = []
+        for kind, deal_id, territory, amount, units, first_count, second_count in self.env.cr.fetchall():
+            if kind == 'deal':
+                earnings[deal_id] = {
+                    'earnings': amount or 0.0,
+                    'units': units or 0,
+                    'recordings': first_count,
+                    'works': second_count,
+                }
+            else:
+                territory_performance.append({
+                    'territory': territory,
+                    'earnings': amount or 0.0,
+                    'units': units or 0,
+                    'deals_count': first_count,
+                })
+        territory_performance.sort(key=lambda x: x['earnings'], reverse=True)
+        return earnings, territory_performance
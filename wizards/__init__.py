@@ -2,3 +2,6 @@
 
 from . import royalty_statement_import
 from . import import_mapping_wizard
+from . import studio_booking_recurrence
+from . import ddex_export_wizard
+from . import catalog_bulk_import
@@ -0,0 +1,618 @@
+# -*- coding: utf-8 -*-
+
+import base64
+import csv
+import io
+import re
+from datetime import datetime
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+# Records created per ORM create() call
+CATALOG_IMPORT_CHUNK_SIZE = 2000
+# Error lines kept in the import log
+CATALOG_IMPORT_MAX_LOGGED_ERRORS = 200
+
+ISWC_PATTERN = re.compile(r'^T\d{10}$')
+ISRC_PATTERN = re.compile(r'^[A-Z]{2}[A-Z0-9]{3}\d{7}$')
+UPC_PATTERN = re.compile(r'^\d{12,13}$')
+IPI_PATTERN = re.compile(r'^\d{11}$')
+
+# CWR 2.x fixed-width layouts as (start, end) slices of the record line
+CWR_WORK_HEADERS = ('NWR', 'REV', 'ISW', 'EXC')
+CWR_LAYOUTS = {
+    'NWR': {'title': (19, 79), 'language': (79, 81), 'work_ref': (81, 95), 'iswc': (95, 106),
+            'duration': (129, 135)},
+    'SPU': {'name': (30, 75), 'ipi': (87, 98), 'share': (115, 120)},
+    'SWR': {'last_name': (28, 73), 'first_name': (73, 103), 'designation': (104, 106),
+            'ipi': (115, 126), 'share': (129, 134)},
+    'ALT': {'title': (19, 79)},
+    'PER': {'last_name': (19, 64), 'first_name': (64, 94)},
+    'REC': {'release_date': (19, 27), 'duration': (87, 93), 'album_title': (98, 158),
+            'label': (158, 218), 'catalog_number': (218, 236), 'upc': (236, 249),
+            'isrc': (249, 261), 'recording_title': (266, 326), 'version': (326, 386),
+            'artist': (386, 446)},
+}
+CWR_LAYOUTS.update({code: CWR_LAYOUTS['NWR'] for code in ('REV', 'ISW', 'EXC')})
+CWR_LAYOUTS.update({'OPU': CWR_LAYOUTS['SPU'], 'OWR': CWR_LAYOUTS['SWR']})
+
+CWR_WRITER_ROLES = {
+    'C': 'composer',
+    'CA': 'composer',
+    'A': 'lyricist',
+    'AR': 'arranger',
+    'AD': 'arranger',
+}
+
+# Flat CSV spec: one row per writer/publisher share and/or per recording of a work
+CSV_COLUMNS = [
+    'work_ref', 'work_title', 'iswc', 'alternate_titles', 'language', 'work_duration',
+    'party_type', 'party_name', 'party_ipi', 'party_role', 'party_share', 'controlled',
+    'isrc', 'recording_title', 'version', 'artist', 'recording_duration',
+    'release_title', 'upc', 'catalog_number', 'label', 'release_date',
+]
+
+
+def _normalize_iswc(value):
+    return re.sub(r'[^0-9A-Za-z]', '', value or '').upper()
+
+
+def _normalize_isrc(value):
+    return re.sub(r'[^0-9A-Za-z]', '', value or '').upper()
+
+
+def _format_iswc(iswc):
+    return f"{iswc[0]}-{iswc[1:10]}-{iswc[10:]}"
+
+
+def _format_isrc(isrc):
+    return f"{isrc[:2]}-{isrc[2:5]}-{isrc[5:7]}-{isrc[7:]}"
+
+
+def _parse_duration(value):
+    """Seconds from HHMMSS, H:MM:SS, MM:SS or a plain number of seconds."""
+    value = (value or '').strip()
+    if not value:
+        return 0
+    if ':' in value:
+        seconds = 0
+        for part in value.split(':'):
+            seconds = seconds * 60 + int(part or 0)
+        return seconds
+    if len(value) == 6 and value.isdigit():
+        return int(value[:2]) * 3600 + int(value[2:4]) * 60 + int(value[4:])
+    return int(float(value))
+
+
+def _parse_share(value):
+    """CWR shares are five digits with two implied decimals (05000 = 50.00%)."""
+    value = (value or '').strip()
+    return int(value) / 100.0 if value.isdigit() else 0.0
+
+
+def _parse_date(value):
+    value = (value or '').strip()
+    for date_format in ('%Y%m%d', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+class CatalogBulkImport(models.TransientModel):
+    _name = 'catalog.bulk.import'
+    _description = 'Catalog Bulk Import Wizard'
+
+    file_data = fields.Binary(string='Catalog File', required=True,
+                              help='CWR 2.x transmission or CSV file following the flat catalog spec')
+    filename = fields.Char(string='File Name')
+    file_format = fields.Selection([
+        ('cwr', 'CWR 2.x'),
+        ('csv', 'Flat CSV'),
+    ], string='Format', required=True, default='cwr')
+    encoding = fields.Selection([
+        ('utf-8', 'UTF-8'),
+        ('latin-1', 'Latin-1'),
+        ('cp1252', 'Windows-1252')
+    ], string='File Encoding', default='latin-1')
+    dry_run = fields.Boolean(string='Dry Run (Validate Only)', default=True)
+    create_releases = fields.Boolean(string='Create Releases', default=True,
+                                     help='Create releases from the album/UPC data of the recordings')
+
+    state = fields.Selection([
+        ('draft', 'Configuration'),
+        ('completed', 'Completed'),
+    ], string='State', default='draft')
+    import_log = fields.Text(string='Import Log', readonly=True)
+    work_count = fields.Integer(string='Works', readonly=True)
+    split_count = fields.Integer(string='Splits', readonly=True)
+    recording_count = fields.Integer(string='Recordings', readonly=True)
+    release_count = fields.Integer(string='Releases', readonly=True)
+    skipped_count = fields.Integer(string='Already in Catalog', readonly=True)
+    error_count = fields.Integer(string='Rejected', readonly=True)
+
+    @api.onchange('filename')
+    def _onchange_filename(self):
+        if self.filename:
+            self.file_format = 'csv' if self.filename.lower().endswith('.csv') else 'cwr'
+
+    def action_import(self):
+        """Parse, validate and load the catalog file"""
+        self.ensure_one()
+        if not self.file_data:
+            raise UserError(_('Please upload a file first'))
+        content = base64.b64decode(self.file_data).decode(self.encoding)
+        works = self._parse_cwr(content) if self.file_format == 'cwr' else self._parse_csv(content)
+        if not works:
+            raise UserError(_('No works found in the file.'))
+
+        errors = []
+        parsed_count = len(works)
+        works = self._validate_works(works, errors)
+        rejected_count = len(errors)
+        stats = {'works': 0, 'splits': 0, 'recordings': 0, 'releases': 0, 'skipped': 0}
+        if not self.dry_run:
+            stats = self._load_works(works, errors)
+        else:
+            stats['works'] = sum(1 for work in works if not work.get('existing_id'))
+            stats['skipped'] = len(works) - stats['works']
+            stats['splits'] = sum(len(work['parties']) for work in works if not work.get('existing_id'))
+            stats['recordings'] = sum(len(work['recordings']) for work in works)
+
+        log = [_('%s works parsed, %s rejected.') % (parsed_count, rejected_count)]
+        log += errors[:CATALOG_IMPORT_MAX_LOGGED_ERRORS]
+        if len(errors) > CATALOG_IMPORT_MAX_LOGGED_ERRORS:
+            log.append(_('... %s more errors') % (len(errors) - CATALOG_IMPORT_MAX_LOGGED_ERRORS))
+        self.write({
+            'state': 'completed',
+            'work_count': stats['works'],
+            'split_count': stats['splits'],
+            'recording_count': stats['recordings'],
+            'release_count': stats['releases'],
+            'skipped_count': stats['skipped'],
+            'error_count': len(errors),
+            'import_log': '\n'.join(log),
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    # ------------------------------------------------------------------
+    # Parsing
+    # ------------------------------------------------------------------
+
+    def _new_work(self, line_number, **values):
+        work = {
+            'line': line_number, 'work_ref': '', 'title': '', 'iswc': '', 'language': '',
+            'duration': 0, 'alternate_titles': [], 'parties': [], 'performers': [],
+            'recordings': [], 'problems': [],
+        }
+        work.update(values)
+        return work
+
+    def _parse_cell(self, parser, value, label, line_number, problems):
+        """Parse one raw cell, recording a problem instead of raising on malformed input."""
+        try:
+            return parser(value)
+        except (ValueError, OverflowError):
+            problems.append(_('invalid %s %r on line %s') % (label, value, line_number))
+            return 0
+
+    def _get_role_lookup(self):
+        """Map lowercase split roles, their labels and CWR designation codes to roles."""
+        lookup = {}
+        for value, label in self.env['publ.split']._fields['role'].selection:
+            lookup[value] = lookup[label.lower()] = value
+        lookup.update({code.lower(): role for code, role in CWR_WRITER_ROLES.items()})
+        return lookup
+
+    def _parse_cwr(self, content):
+        """Group the CWR transactions into work dicts; unknown record types are ignored."""
+        works = []
+        work = None
+        for line_number, line in enumerate(content.splitlines(), start=1):
+            record_type = line[:3]
+            layout = CWR_LAYOUTS.get(record_type)
+            if not layout:
+                continue
+            values = {key: line[start:end].strip() for key, (start, end) in layout.items()}
+            if record_type in CWR_WORK_HEADERS:
+                work = self._new_work(
+                    line_number,
+                    work_ref=values['work_ref'],
+                    title=values['title'],
+                    iswc=values['iswc'],
+                    language=values['language'],
+                )
+                work['duration'] = self._parse_cell(
+                    _parse_duration, values['duration'], _('duration'), line_number, work['problems'])
+                works.append(work)
+            elif work is None:
+                continue
+            elif record_type in ('SPU', 'OPU'):
+                work['parties'].append({
+                    'type': 'publisher',
+                    'name': values['name'],
+                    'ipi': values['ipi'],
+                    'role': 'publisher',
+                    'share': _parse_share(values['share']),
+                    'controlled': record_type == 'SPU',
+                })
+            elif record_type in ('SWR', 'OWR'):
+                name = ' '.join(part for part in (values['first_name'], values['last_name']) if part)
+                work['parties'].append({
+                    'type': 'writer',
+                    'name': name,
+                    'ipi': values['ipi'],
+                    'role': CWR_WRITER_ROLES.get(values['designation'], 'other'),
+                    'share': _parse_share(values['share']),
+                    'controlled': record_type == 'SWR',
+                })
+            elif record_type == 'ALT':
+                work['alternate_titles'].append(values['title'])
+            elif record_type == 'PER':
+                work['performers'].append(
+                    ' '.join(part for part in (values['first_name'], values['last_name']) if part)
+                )
+            elif record_type == 'REC' and values['isrc']:
+                work['recordings'].append({
+                    'isrc': values['isrc'],
+                    'title': values['recording_title'],
+                    'version': values['version'],
+                    'artist': values['artist'],
+                    'duration': self._parse_cell(
+                        _parse_duration, values['duration'], _('duration'), line_number, work['problems']),
+                    'release': {
+                        'title': values['album_title'],
+                        'upc': values['upc'],
+                        'catalog_number': values['catalog_number'],
+                        'label': values['label'],
+                        'date': _parse_date(values['release_date']),
+                    },
+                })
+        return works
+
+    def _parse_csv(self, content):
+        """Fold the flat CSV rows into work dicts keyed by work_ref (or ISWC/title)."""
+        reader = csv.DictReader(io.StringIO(content))
+        columns = set(reader.fieldnames or [])
+        if 'work_title' not in columns:
+            raise UserError(_('Missing CSV column: work_title'))
+        unknown = columns - set(CSV_COLUMNS)
+        if unknown:
+            raise UserError(_('Unknown CSV columns: %s\nExpected columns: %s')
+                            % (', '.join(sorted(unknown)), ', '.join(CSV_COLUMNS)))
+        roles = self._get_role_lookup()
+        works = {}
+        for line_number, row in enumerate(reader, start=2):
+            row = {key: (value or '').strip() for key, value in row.items() if key}
+            key = row.get('work_ref') or row.get('iswc') or row['work_title'].lower()
+            work = works.get(key)
+            if work is None:
+                work = works[key] = self._new_work(
+                    line_number,
+                    work_ref=row.get('work_ref', ''),
+                    title=row['work_title'],
+                    iswc=row.get('iswc', ''),
+                    language=row.get('language', ''),
+                    alternate_titles=[title for title in row.get('alternate_titles', '').split('|') if title],
+                )
+                work['duration'] = self._parse_cell(
+                    _parse_duration, row.get('work_duration'), _('work duration'), line_number, work['problems'])
+            if row.get('party_name'):
+                party_type = 'publisher' if row.get('party_type', '').lower() == 'publisher' else 'writer'
+                if party_type == 'publisher':
+                    role = 'publisher'
+                else:
+                    # Accepts role values, their labels ("Composer") and CWR codes ("CA")
+                    role = roles.get((row.get('party_role') or 'composer').lower(), 'other')
+                work['parties'].append({
+                    'type': party_type,
+                    'name': row['party_name'],
+                    'ipi': row.get('party_ipi', ''),
+                    'role': role,
+                    'share': self._parse_cell(
+                        lambda value: float((value or '0').rstrip('%')),
+                        row.get('party_share'), _('share'), line_number, work['problems']),
+                    'controlled': row.get('controlled', '1').lower() not in ('0', 'false', 'no', 'n'),
+                })
+            if row.get('isrc'):
+                work['recordings'].append({
+                    'isrc': row['isrc'],
+                    'title': row.get('recording_title', ''),
+                    'version': row.get('version', ''),
+                    'artist': row.get('artist', ''),
+                    'duration': self._parse_cell(
+                        _parse_duration, row.get('recording_duration'), _('recording duration'),
+                        line_number, work['problems']),
+                    'release': {
+                        'title': row.get('release_title', ''),
+                        'upc': row.get('upc', ''),
+                        'catalog_number': row.get('catalog_number', ''),
+                        'label': row.get('label', ''),
+                        'date': _parse_date(row.get('release_date')),
+                    },
+                })
+        return list(works.values())
+
+    # ------------------------------------------------------------------
+    # Validation
+    # ------------------------------------------------------------------
+
+    def _validate_works(self, works, errors):
+        """Validate and normalize every code in whole-file passes.
+
+        Rejected works are dropped and reported in ``errors``. Works whose ISWC
+        already exists get ``existing_id`` set, and recordings whose ISRC already
+        exists are dropped, so a file can be loaded again safely.
+        """
+        valid = []
+        for work in works:
+            problems = list(work['problems'])
+            if not work['title']:
+                problems.append(_('missing title'))
+            if work['iswc']:
+                work['iswc'] = _normalize_iswc(work['iswc'])
+                if not ISWC_PATTERN.match(work['iswc']):
+                    problems.append(_('invalid ISWC %s') % work['iswc'])
+            for party in work['parties']:
+                # IPI name numbers are zero-padded to 11 digits; anything else is ignored
+                ipi = re.sub(r'\D', '', party['ipi'])
+                party['ipi'] = ipi.zfill(11) if ipi.strip('0') and IPI_PATTERN.match(ipi.zfill(11)) else ''
+                if not 0 <= party['share'] <= 100:
+                    problems.append(_('share out of range for %s') % party['name'])
+            for party_type in ('writer', 'publisher'):
+                total = sum(party['share'] for party in work['parties'] if party['type'] == party_type)
+                if total > 100.01:
+                    problems.append(_('%s shares add up to %s%%') % (party_type, round(total, 2)))
+            recordings = []
+            for recording in work['recordings']:
+                recording['isrc'] = _normalize_isrc(recording['isrc'])
+                if not ISRC_PATTERN.match(recording['isrc']):
+                    problems.append(_('invalid ISRC %s') % recording['isrc'])
+                    continue
+                release = recording['release']
+                release['upc'] = re.sub(r'\D', '', release['upc'])
+                if release['upc'] and not UPC_PATTERN.match(release['upc']):
+                    problems.append(_('invalid UPC %s') % release['upc'])
+                    continue
+                recordings.append(recording)
+            work['recordings'] = recordings
+            if problems:
+                errors.append(_('Line %s (%s): %s') % (work['line'], work['title'] or work['work_ref'], '; '.join(problems)))
+            else:
+                valid.append(work)
+
+        # Duplicates inside the file: keep the first occurrence of each ISWC / ISRC
+        seen_iswcs = set()
+        seen_isrcs = set()
+        deduplicated = []
+        for work in valid:
+            if work['iswc'] and work['iswc'] in seen_iswcs:
+                errors.append(_('Line %s (%s): duplicate ISWC in file') % (work['line'], work['title']))
+                continue
+            seen_iswcs.add(work['iswc'])
+            recordings = []
+            for recording in work['recordings']:
+                if recording['isrc'] not in seen_isrcs:
+                    seen_isrcs.add(recording['isrc'])
+                    recordings.append(recording)
+            work['recordings'] = recordings
+            deduplicated.append(work)
+
+        # Duplicates against the catalog, one query per code type
+        existing_works = {}
+        # Older records may hold the unformatted code
+        iswcs = [code for work in deduplicated if work['iswc']
+                 for code in (work['iswc'], _format_iswc(work['iswc']))]
+        if iswcs:
+            for work in self.env['music.work'].with_context(active_test=False).search_fetch(
+                    [('iswc', 'in', iswcs)], ['iswc']):
+                existing_works[_normalize_iswc(work.iswc)] = work.id
+        existing_isrcs = set()
+        isrcs = [code for isrc in seen_isrcs for code in (isrc, _format_isrc(isrc))]
+        if isrcs:
+            recordings = self.env['music.recording'].with_context(active_test=False).search_fetch(
+                [('isrc', 'in', isrcs)], ['isrc'])
+            existing_isrcs = {_normalize_isrc(recording.isrc) for recording in recordings}
+        for work in deduplicated:
+            work['existing_id'] = existing_works.get(work['iswc'])
+            work['recordings'] = [
+                recording for recording in work['recordings'] if recording['isrc'] not in existing_isrcs
+            ]
+        return deduplicated
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _get_partners(self, works):
+        """Map (kind, ipi or name) to partner ids, creating the missing ones in one call."""
+        Partner = self.env['res.partner'].with_context(active_test=False)
+        wanted = {}
+        for work in works:
+            for party in work['parties']:
+                key = ('ipi', party['ipi']) if party['ipi'] else ('name', party['name'])
+                wanted.setdefault(key, {
+                    'name': party['name'],
+                    'ipi_number': party['ipi'] or False,
+                    'is_writer': party['type'] == 'writer',
+                    'is_company': party['type'] == 'publisher',
+                })
+            for name in work['performers'] + [recording['artist'] for recording in work['recordings']]:
+                if name:
+                    wanted.setdefault(('name', name), {'name': name, 'is_artist': True})
+            for recording in work['recordings']:
+                label = recording['release']['label']
+                if label:
+                    wanted.setdefault(('name', label), {'name': label, 'is_company': True})
+
+        partner_ids = {}
+        ipis = [value for kind, value in wanted if kind == 'ipi']
+        if ipis:
+            for partner in Partner.search_fetch([('ipi_number', 'in', ipis)], ['ipi_number']):
+                partner_ids[('ipi', partner.ipi_number)] = partner.id
+        names = [value for kind, value in wanted if kind == 'name']
+        if names:
+            for partner in Partner.search_fetch([('name', 'in', names)], ['name'], order='id'):
+                partner_ids.setdefault(('name', partner.name), partner.id)
+
+        missing = [key for key in wanted if key not in partner_ids]
+        if missing:
+            partners = Partner.create([wanted[key] for key in missing])
+            partner_ids.update(zip(missing, partners.ids))
+        return partner_ids
+
+    def _load_works(self, works, errors):
+        """Create works, splits, recordings and releases in chunked multi-record creates.
+
+        Codes were validated for the whole file beforehand, so the per-record
+        format constraints are skipped, and chatter tracking is turned off.
+        """
+        env = self.env(context=dict(
+            self.env.context,
+            tracking_disable=True,
+            mail_create_nolog=True,
+            mail_create_nosubscribe=True,
+            mail_notrack=True,
+            skip_catalog_code_checks=True,
+        ))
+        Work = env['music.work']
+        Recording = env['music.recording']
+        Release = env['music.release']
+        stats = {'works': 0, 'splits': 0, 'recordings': 0, 'releases': 0, 'skipped': 0}
+        partner_ids = self._get_partners(works)
+
+        def party_id(party):
+            return partner_ids[('ipi', party['ipi']) if party['ipi'] else ('name', party['name'])]
+
+        # Works and their splits: one create per chunk, splits go through the one2many
+        new_works = [work for work in works if not work['existing_id']]
+        stats['skipped'] = len(works) - len(new_works)
+        for start in range(0, len(new_works), CATALOG_IMPORT_CHUNK_SIZE):
+            chunk = new_works[start:start + CATALOG_IMPORT_CHUNK_SIZE]
+            vals_list = []
+            for work in chunk:
+                writers = [party for party in work['parties'] if party['type'] == 'writer']
+                publishers = [party for party in work['parties'] if party['type'] == 'publisher']
+                writer_total = sum(party['share'] for party in writers)
+                publisher_total = sum(party['share'] for party in publishers)
+                splits = []
+                for sequence, party in enumerate(work['parties'], start=1):
+                    # CWR shares are of the whole work; splits hold each side out of 100%
+                    if party['type'] == 'writer':
+                        shares = {'writer_share': party['share'] * 100.0 / writer_total if writer_total else 0.0}
+                    else:
+                        shares = {'publisher_share': party['share'] * 100.0 / publisher_total if publisher_total else 0.0}
+                    splits.append((0, 0, dict(
+                        shares,
+                        sequence=sequence,
+                        contributor_id=party_id(party),
+                        role=party['role'],
+                        controlled=party['controlled'],
+                    )))
+                vals_list.append({
+                    'title': work['title'],
+                    'iswc': _format_iswc(work['iswc']) if work['iswc'] else False,
+                    'alternate_titles': '\n'.join(work['alternate_titles']) or False,
+                    'duration_seconds': work['duration'],
+                    'composer_ids': [(6, 0, list({party_id(party) for party in writers}))],
+                    'publisher_ids': [(6, 0, list({party_id(party) for party in publishers}))],
+                    'split_ids': splits,
+                })
+                stats['splits'] += len(splits)
+            for work, record in zip(chunk, Work.create(vals_list)):
+                work['existing_id'] = record.id
+            stats['works'] += len(chunk)
+            env.flush_all()
+            env.invalidate_all()
+
+        # Recordings, grouped afterwards by release
+        pending = [(work, recording) for work in works for recording in work['recordings']]
+        release_tracks = {}
+        for start in range(0, len(pending), CATALOG_IMPORT_CHUNK_SIZE):
+            chunk = pending[start:start + CATALOG_IMPORT_CHUNK_SIZE]
+            vals_list = []
+            for work, recording in chunk:
+                artists = [recording['artist']] if recording['artist'] else work['performers']
+                vals_list.append({
+                    'title': recording['title'] or work['title'],
+                    'version': recording['version'] or False,
+                    'isrc': _format_isrc(recording['isrc']),
+                    'work_id': work['existing_id'],
+                    'duration_seconds': recording['duration'] or work['duration'],
+                    'main_artist_ids': [(6, 0, [partner_ids[('name', name)] for name in artists if name])],
+                })
+            records = Recording.create(vals_list)
+            stats['recordings'] += len(records)
+            for (work, recording), record in zip(chunk, records):
+                release = recording['release']
+                key = release['upc'] or release['catalog_number'] or release['title']
+                if key:
+                    release_tracks.setdefault(key, (release, []))[1].append(record.id)
+            env.flush_all()
+            env.invalidate_all()
+
+        if self.create_releases and release_tracks:
+            stats['releases'] = self._load_releases(Release, release_tracks, partner_ids, errors)
+        return stats
+
+    def _load_releases(self, Release, release_tracks, partner_ids, errors):
+        """Create the missing releases and attach the new recordings to them.
+
+        Releases are matched to the catalog by UPC, then by catalog number,
+        then by title and release date, the same keys used to group them.
+        """
+        releases = [release for release, _tracks in release_tracks.values()]
+        upcs = [release['upc'] for release in releases if release['upc']]
+        catalog_numbers = [release['catalog_number'] for release in releases
+                           if not release['upc'] and release['catalog_number']]
+        titles = [release['title'] for release in releases
+                  if not release['upc'] and not release['catalog_number'] and release['title']]
+        existing = {}
+        Existing = Release.with_context(active_test=False)
+        if upcs:
+            for record in Existing.search_fetch([('upc', 'in', upcs)], ['upc']):
+                existing[('upc', record.upc)] = record
+        if catalog_numbers:
+            for record in Existing.search_fetch([('catalog_number', 'in', catalog_numbers)],
+                                                ['catalog_number'], order='id'):
+                existing.setdefault(('catalog_number', record.catalog_number), record)
+        if titles:
+            for record in Existing.search_fetch([('title', 'in', titles)], ['title', 'release_date'], order='id'):
+                existing.setdefault(('title', record.title, record.release_date), record)
+
+        to_create = []
+        for key, (release, track_ids) in release_tracks.items():
+            if release['upc']:
+                record = existing.get(('upc', release['upc']))
+            elif release['catalog_number']:
+                record = existing.get(('catalog_number', release['catalog_number']))
+            else:
+                record = existing.get(('title', release['title'], release['date']))
+            if record:
+                record.write({'recording_ids': [(4, track_id) for track_id in track_ids]})
+            elif not release['date'] or not release['title']:
+                errors.append(_('Release %s: missing title or release date, recordings left unassigned') % key)
+            else:
+                vals = {
+                    'title': release['title'],
+                    'upc': release['upc'] or False,
+                    'release_date': release['date'],
+                    'label_id': partner_ids.get(('name', release['label'])) if release['label'] else False,
+                    'release_type': 'single' if len(track_ids) == 1 else 'album',
+                    'recording_ids': [(6, 0, track_ids)],
+                }
+                # Keep the file's catalog number so the next import finds this release
+                if release['catalog_number']:
+                    vals['catalog_number'] = release['catalog_number']
+                to_create.append(vals)
+        for start in range(0, len(to_create), CATALOG_IMPORT_CHUNK_SIZE):
+            Release.create(to_create[start:start + CATALOG_IMPORT_CHUNK_SIZE])
+        return len(to_create)
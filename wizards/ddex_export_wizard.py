@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+import base64
+import tempfile
+import zipfile
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+
+class DdexExportWizard(models.TransientModel):
+    _name = 'ddex.export.wizard'
+    _description = 'DDEX ERN Package Export Wizard'
+
+    release_ids = fields.Many2many('music.release', string='Releases', required=True)
+    release_count = fields.Integer(string='Releases', compute='_compute_release_count')
+    control_type = fields.Selection([
+        ('LiveMessage', 'Live'),
+        ('TestMessage', 'Test'),
+    ], string='Message Type', default='LiveMessage', required=True)
+    recipient_party_id = fields.Char(string='Recipient Party ID',
+                                     help='DPID of the recipient; defaults to the release distributor name only')
+    recipient_name = fields.Char(string='Recipient Name',
+                                 help='Leave empty to address each message to the release distributor')
+    include_artwork = fields.Boolean(string='Include Cover Artwork', default=True)
+
+    # Results
+    export_data = fields.Binary(string='Package', readonly=True)
+    export_filename = fields.Char(string='Filename', readonly=True)
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        if 'release_ids' in fields_list and not res.get('release_ids') \
+                and self.env.context.get('active_model') == 'music.release':
+            res['release_ids'] = [(6, 0, self.env.context.get('active_ids', []))]
+        return res
+
+    @api.depends('release_ids')
+    def _compute_release_count(self):
+        for wizard in self:
+            wizard.release_count = len(wizard.release_ids)
+
+    def action_generate(self):
+        """Build one ERN package per release and bundle them in a zip archive"""
+        self.ensure_one()
+        if not self.release_ids:
+            raise UserError(_('Select at least one release.'))
+        recipient = {'party_id': self.recipient_party_id, 'name': self.recipient_name}
+        # Spill to disk so a full catalog re-delivery does not sit in memory
+        with tempfile.TemporaryFile() as buffer:
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+                self.env['ddex.ern.builder'].write_packages(
+                    archive, self.release_ids, recipient, self.control_type, self.include_artwork,
+                )
+            buffer.seek(0)
+            timestamp = fields.Datetime.now().strftime('%Y%m%d_%H%M%S')
+            self.write({
+                'export_data': base64.b64encode(buffer.read()),
+                'export_filename': f"ddex_ern_{timestamp}.zip",
+            })
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/web/content?model={self._name}&id={self.id}&field=export_data&download=true&filename={self.export_filename}',
+            'target': 'self',
+        }
@@ -4,6 +4,9 @@ from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 import json
 
+# Rows per Parquet row group when exporting usage data
+PARQUET_ROW_GROUP_SIZE = 50000
+
 
 class RoyaltyImportMappingWizard(models.TransientModel):
     _name = 'royalty.import.mapping.wizard'
@@ -246,6 +249,7 @@ class RoyaltyExportWizard(models.TransientModel):
         ('csv', 'CSV'),
         ('xlsx', 'Excel'),
         ('json', 'JSON'),
+        ('parquet', 'Parquet'),
     ], string='File Format', required=True, default='csv')
     
     include_unmatched = fields.Boolean(string='Include Unmatched Lines', default=True)
@@ -278,31 +282,12 @@ class RoyaltyExportWizard(models.TransientModel):
         if not lines:
             raise UserError(_('No data found for the specified criteria'))
         
-        # Prepare export data
-        export_data = []
-        for line in lines:
-            row = {
-                'Import Batch': line.import_batch_id or '',
-                'Source Type': dict(line._fields['source_type'].selection).get(line.source_type, ''),
-                'Source': line.source_id.name if line.source_id else '',
-                'Period Start': line.period_start.strftime('%Y-%m-%d') if line.period_start else '',
-                'Period End': line.period_end.strftime('%Y-%m-%d') if line.period_end else '',
-                'Track Name': line.track_name or '',
-                'Artist Name': line.artist_name or '',
-                'Album Name': line.album_name or '',
-                'ISRC': line.isrc or '',
-                'Usage Type': line.usage_type or '',
-                'Service': line.service or '',
-                'Territory': line.territory_code or '',
-                'Units': line.units or 0,
-                'Gross Amount': line.gross_amount or 0.0,
-                'Fees': line.fees or 0.0,
-                'Net Amount': line.net_amount or 0.0,
-                'Matched State': dict(line._fields['matched_state'].selection).get(line.matched_state, ''),
-                'Recording': line.recording_id.title if line.recording_id else '',
-                'Work': line.work_id.title if line.work_id else '',
-            }
-            export_data.append(row)
+        if self.file_format == 'parquet':
+            # Stream typed rows straight into row groups instead of
+            # materializing the whole export as a list of dicts
+            export_data = self._iter_usage_line_rows(lines, typed=True)
+        else:
+            export_data = list(self._iter_usage_line_rows(lines))
         
         # Generate file
         filename, file_data = self._generate_export_file(export_data, 'usage_lines')
@@ -312,6 +297,48 @@ class RoyaltyExportWizard(models.TransientModel):
         
         return self._download_file()
     
+    def _iter_usage_line_rows(self, lines, typed=False):
+        """Yield one export row per usage line, prefetching chunk by chunk.
+
+        With ``typed`` the dates, units and amounts are kept as native
+        values so binary formats can preserve their column types.
+        """
+        source_types = dict(lines._fields['source_type'].selection)
+        matched_states = dict(lines._fields['matched_state'].selection)
+        
+        for offset in range(0, len(lines), PARQUET_ROW_GROUP_SIZE):
+            chunk = lines[offset:offset + PARQUET_ROW_GROUP_SIZE]
+            for line in chunk:
+                if typed:
+                    period_start = line.period_start or None
+                    period_end = line.period_end or None
+                else:
+                    period_start = line.period_start.strftime('%Y-%m-%d') if line.period_start else ''
+                    period_end = line.period_end.strftime('%Y-%m-%d') if line.period_end else ''
+                yield {
+                    'Import Batch': line.import_batch_id or '',
+                    'Source Type': source_types.get(line.source_type, ''),
+                    'Source': line.source_id.name if line.source_id else '',
+                    'Period Start': period_start,
+                    'Period End': period_end,
+                    'Track Name': line.track_name or '',
+                    'Artist Name': line.artist_name or '',
+                    'Album Name': line.album_name or '',
+                    'ISRC': line.isrc or '',
+                    'Usage Type': line.usage_type or '',
+                    'Service': line.service or '',
+                    'Territory': line.territory_code or '',
+                    'Units': line.units or 0,
+                    'Gross Amount': line.gross_amount or 0.0,
+                    'Fees': line.fees or 0.0,
+                    'Net Amount': line.net_amount or 0.0,
+                    'Matched State': matched_states.get(line.matched_state, ''),
+                    'Recording': line.recording_id.title if line.recording_id else '',
+                    'Work': line.work_id.title if line.work_id else '',
+                }
+            # Drop the chunk from the cache before moving on
+            chunk.invalidate_recordset()
+    
     def _build_usage_lines_domain(self):
         """Build domain for usage lines export"""
         domain = []
@@ -348,6 +375,8 @@ class RoyaltyExportWizard(models.TransientModel):
             return self._generate_excel(data, filename)
         elif self.file_format == 'json':
             return self._generate_json(data, filename)
+        elif self.file_format == 'parquet':
+            return self._generate_parquet(data, filename, export_name)
     
     def _generate_csv(self, data, filename):
         """Generate CSV file"""
@@ -404,6 +433,68 @@ class RoyaltyExportWizard(models.TransientModel):
         file_data = base64.b64encode(json_data.encode('utf-8'))
         return filename, file_data
     
+    def _generate_parquet(self, data, filename, export_name=None):
+        """Generate Parquet file, writing one row group per batch of rows"""
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            import io
+            import base64
+        except ImportError:
+            raise UserError(_('pyarrow library not installed. Cannot generate Parquet files.'))
+        
+        output = io.BytesIO()
+        schema = self._get_parquet_schema(export_name)
+        writer = None
+        batch = []
+        
+        def flush(rows):
+            nonlocal writer
+            table = pa.Table.from_pylist(rows, schema=writer.schema if writer else schema)
+            if writer is None:
+                writer = pq.ParquetWriter(output, table.schema, compression='snappy')
+            writer.write_table(table, row_group_size=PARQUET_ROW_GROUP_SIZE)
+        
+        for row in data:
+            batch.append(row)
+            if len(batch) >= PARQUET_ROW_GROUP_SIZE:
+                flush(batch)
+                batch = []
+        if batch or writer is None:
+            flush(batch)
+        writer.close()
+        
+        file_data = base64.b64encode(output.getvalue())
+        return filename, file_data
+    
+    def _get_parquet_schema(self, export_name):
+        """Explicit column types for Parquet exports, or None to infer them"""
+        import pyarrow as pa
+        
+        if export_name != 'usage_lines':
+            return None
+        return pa.schema([
+            ('Import Batch', pa.string()),
+            ('Source Type', pa.string()),
+            ('Source', pa.string()),
+            ('Period Start', pa.date32()),
+            ('Period End', pa.date32()),
+            ('Track Name', pa.string()),
+            ('Artist Name', pa.string()),
+            ('Album Name', pa.string()),
+            ('ISRC', pa.string()),
+            ('Usage Type', pa.string()),
+            ('Service', pa.string()),
+            ('Territory', pa.string()),
+            ('Units', pa.int64()),
+            ('Gross Amount', pa.float64()),
+            ('Fees', pa.float64()),
+            ('Net Amount', pa.float64()),
+            ('Matched State', pa.string()),
+            ('Recording', pa.string()),
+            ('Work', pa.string()),
+        ])
+    
     def _download_file(self):
         """Return file download action"""
         return {
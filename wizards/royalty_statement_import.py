@@ -15,7 +15,7 @@ class RoyaltyStatementImport(models.TransientModel):
 
     # File Upload
     file_data = fields.Binary(string='Statement File', required=True,
-                             help='CSV, TSV, or Excel file containing usage data')
+                             help='CSV, TSV, Excel or Parquet file containing usage data')
     filename = fields.Char(string='File Name')
     
     # Source Configuration
@@ -129,8 +129,10 @@ class RoyaltyStatementImport(models.TransientModel):
                 preview_data = self._parse_csv_preview(file_content)
             elif self.filename.endswith(('.xls', '.xlsx')):
                 preview_data = self._parse_excel_preview(file_content)
+            elif self.filename.endswith(('.parquet', '.pq')):
+                preview_data = self._parse_parquet_preview(file_content)
             else:
-                raise UserError(_('Unsupported file format. Please upload CSV, TSV, or Excel files.'))
+                raise UserError(_('Unsupported file format. Please upload CSV, TSV, Excel or Parquet files.'))
             
             self.preview_data = preview_data
             self.state = 'preview'
@@ -266,6 +268,64 @@ class RoyaltyStatementImport(models.TransientModel):
         except Exception as e:
             raise UserError(_('Error parsing Excel: %s') % str(e))
 
+    def _parse_parquet_preview(self, file_content):
+        """Parse Parquet content and return preview"""
+        try:
+            import pyarrow.parquet as pq
+            
+            parquet_file = pq.ParquetFile(io.BytesIO(file_content))
+            header = parquet_file.schema_arrow.names
+            
+            # Only the first batch is decoded for the sample rows
+            sample_rows = []
+            for batch in parquet_file.iter_batches(batch_size=5):
+                sample_rows = [list(row.values()) for row in batch.to_pylist()]
+                break
+            
+            preview = {
+                'header': header,
+                'sample_rows': sample_rows,
+                'total_rows': parquet_file.metadata.num_rows,
+            }
+            
+            return json.dumps(preview, indent=2, default=str)
+            
+        except ImportError:
+            raise UserError(_('pyarrow library not installed. Cannot process Parquet files.'))
+        except Exception as e:
+            raise UserError(_('Error parsing Parquet: %s') % str(e))
+
+    def _parse_parquet_data(self, file_content, mapping):
+        """Parse Parquet data with column mapping, one record batch at a time"""
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise UserError(_('pyarrow library not installed. Cannot process Parquet files.'))
+        
+        parquet_file = pq.ParquetFile(io.BytesIO(file_content))
+        column_names = parquet_file.schema_arrow.names
+        
+        # Parquet columns are always named; integer mappings address them by position
+        column_for_field = {}
+        for field, column in mapping.items():
+            if isinstance(column, int):
+                if column < len(column_names):
+                    column_for_field[field] = column_names[column]
+            elif column in column_names:
+                column_for_field[field] = column
+        
+        usage_data = []
+        columns = sorted(set(column_for_field.values()))
+        for batch in parquet_file.iter_batches(batch_size=self.batch_size or 1000, columns=columns):
+            values = batch.to_pydict()
+            for index in range(batch.num_rows):
+                usage_data.append({
+                    field: values[column][index]
+                    for field, column in column_for_field.items()
+                })
+        
+        return usage_data
+
     def _process_dry_run(self, mapping):
         """Process file in dry-run mode for validation"""
         errors = []
@@ -404,6 +464,8 @@ Errors: {error_count}\
             return self._parse_csv_data(file_content, mapping)
         elif self.filename.endswith(('.xls', '.xlsx')):
             return self._parse_excel_data(file_content, mapping)
+        elif self.filename.endswith(('.parquet', '.pq')):
+            return self._parse_parquet_data(file_content, mapping)
         else:
             raise UserError(_('Unsupported file format'))
 
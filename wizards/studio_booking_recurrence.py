@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, time, timedelta
+
+import pytz
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError, ValidationError
+
+WEEKDAY_FIELDS = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+MAX_OCCURRENCES = 500
+
+
+class StudioBookingRecurrence(models.TransientModel):
+    _name = 'studio.booking.recurrence'
+    _description = 'Recurring / Block Studio Booking Wizard'
+
+    client_id = fields.Many2one('res.partner', string='Client', required=True)
+    room_id = fields.Many2one('studio.room', string='Room', required=True)
+    engineer_id = fields.Many2one('res.partner', string='Engineer', domain=[('is_engineer', '=', True)])
+    package_id = fields.Many2one('studio.package', string='Package Deal')
+    project_name = fields.Char(string='Project Name')
+
+    # Recurrence rule
+    date_from = fields.Date(string='First Day', required=True, default=fields.Date.context_today)
+    date_to = fields.Date(string='Last Day', required=True)
+    start_time = fields.Float(string='Start Time', required=True, default=10.0,
+                              help='Local start time of each occurrence (hours, e.g. 10.5 = 10:30)')
+    end_time = fields.Float(string='End Time', required=True, default=18.0)
+    interval_weeks = fields.Integer(string='Every (weeks)', default=1)
+    mon = fields.Boolean(string='Mon', default=True)
+    tue = fields.Boolean(string='Tue', default=True)
+    wed = fields.Boolean(string='Wed', default=True)
+    thu = fields.Boolean(string='Thu', default=True)
+    fri = fields.Boolean(string='Fri', default=True)
+    sat = fields.Boolean(string='Sat')
+    sun = fields.Boolean(string='Sun')
+
+    # Outcome
+    confirm_bookings = fields.Boolean(string='Confirm Bookings', default=True)
+    skip_conflicts = fields.Boolean(string='Skip Conflicting Days',
+                                    help='Create the free occurrences only instead of refusing the whole block.')
+    consolidated_deposit = fields.Boolean(string='Single Deposit Invoice', default=True)
+    deposit_percentage = fields.Float(string='Deposit Percentage (%)', default=50.0)
+
+    occurrence_count = fields.Integer(string='Occurrences', compute='_compute_preview')
+    conflict_count = fields.Integer(string='Conflicts', compute='_compute_preview')
+    conflict_summary = fields.Text(string='Conflict Details', compute='_compute_preview')
+
+    @api.onchange('package_id')
+    def _onchange_package_id(self):
+        if self.package_id:
+            if self.package_id.room_id:
+                self.room_id = self.package_id.room_id
+            self.end_time = min(self.start_time + self.package_id.duration_hours, 24.0)
+
+    @api.depends('date_from', 'date_to', 'start_time', 'end_time', 'interval_weeks', 'room_id',
+                 'engineer_id', *WEEKDAY_FIELDS)
+    def _compute_preview(self):
+        for wizard in self:
+            wizard.occurrence_count = 0
+            wizard.conflict_count = 0
+            wizard.conflict_summary = False
+            if not (wizard.room_id and wizard.date_from and wizard.date_to) or wizard.end_time <= wizard.start_time:
+                continue
+            intervals = wizard._get_occurrences()
+            conflicts = self.env['studio.booking']._find_conflicts(
+                wizard.room_id._origin.id, intervals, wizard.engineer_id._origin.id
+            )
+            wizard.occurrence_count = len(intervals)
+            wizard.conflict_count = len(conflicts)
+            wizard.conflict_summary = wizard._format_conflicts(intervals, conflicts) or False
+
+    def _get_occurrences(self):
+        """Expand the rule into sorted (start, end) UTC intervals"""
+        self.ensure_one()
+        tz = pytz.timezone(self.env.user.tz or 'UTC')
+        weekdays = {index for index, name in enumerate(WEEKDAY_FIELDS) if self[name]}
+        interval = max(self.interval_weeks, 1)
+        first_week = self.date_from - timedelta(days=self.date_from.weekday())
+        start_delta = timedelta(hours=self.start_time)
+        end_delta = timedelta(hours=self.end_time)
+
+        occurrences = []
+        day = self.date_from
+        while day <= self.date_to:
+            if day.weekday() in weekdays and ((day - first_week).days // 7) % interval == 0:
+                midnight = datetime.combine(day, time.min)
+                # Start and end are localized separately so both keep their wall-clock time across DST
+                start = tz.localize(midnight + start_delta).astimezone(pytz.utc).replace(tzinfo=None)
+                end = tz.localize(midnight + end_delta).astimezone(pytz.utc).replace(tzinfo=None)
+                occurrences.append((start, end))
+                if len(occurrences) > MAX_OCCURRENCES:
+                    raise UserError(_('A block booking cannot exceed %s occurrences.') % MAX_OCCURRENCES)
+            day += timedelta(days=1)
+        return occurrences
+
+    def _format_conflicts(self, intervals, conflicts):
+        tz = pytz.timezone(self.env.user.tz or 'UTC')
+        lines = []
+        for index in sorted(conflicts):
+            local_start = pytz.utc.localize(intervals[index][0]).astimezone(tz)
+            lines.append('%s: %s' % (
+                local_start.strftime('%a %Y-%m-%d %H:%M'),
+                ', '.join(conflicts[index].mapped('name')),
+            ))
+        return '\n'.join(lines)
+
+    def _get_rates(self, duration):
+        """Room and engineer rates for one occurrence of ``duration`` hours"""
+        room = self.room_id
+        if duration >= 8:
+            room_rate = room.day_rate or room.hourly_rate * 8
+        else:
+            room_rate = room.hourly_rate * duration
+        engineer_rate = self.engineer_id.studio_hourly_rate * duration if self.engineer_id else 0.0
+        return room_rate, engineer_rate
+
+    def _prepare_booking_vals(self, intervals, block_reference):
+        self.ensure_one()
+        status = 'confirmed' if self.confirm_bookings else 'pending'
+        vals_list = []
+        for start, end in intervals:
+            # Each occurrence is priced on its own UTC length, which differs on DST change days
+            room_rate, engineer_rate = self._get_rates((end - start).total_seconds() / 3600.0)
+            vals_list.append({
+                'client_id': self.client_id.id,
+                'room_id': self.room_id.id,
+                'engineer_id': self.engineer_id.id,
+                'package_id': self.package_id.id,
+                'project_name': self.project_name,
+                'start_datetime': start,
+                'end_datetime': end,
+                'room_rate': room_rate,
+                'engineer_rate': engineer_rate,
+                'deposit_percentage': self.deposit_percentage,
+                'status': status,
+                'block_reference': block_reference,
+            })
+        return vals_list
+
+    def action_create_bookings(self):
+        self.ensure_one()
+        if self.end_time <= self.start_time:
+            raise ValidationError(_('End time must be after start time'))
+        intervals = self._get_occurrences()
+        if not intervals:
+            raise UserError(_('The recurrence rule does not produce any occurrence.'))
+
+        conflicts = self.env['studio.booking']._find_conflicts(self.room_id.id, intervals, self.engineer_id.id)
+        if conflicts:
+            if not self.skip_conflicts:
+                raise UserError(_('Some occurrences clash with existing bookings:\n%s')
+                                % self._format_conflicts(intervals, conflicts))
+            intervals = [interval for index, interval in enumerate(intervals) if index not in conflicts]
+            if not intervals:
+                raise UserError(_('Every occurrence clashes with an existing booking.'))
+
+        block_reference = self.env['ir.sequence'].next_by_code('studio.booking.block') or _('Block')
+        bookings = self.env['studio.booking'].create(self._prepare_booking_vals(intervals, block_reference))
+
+        if self.confirm_bookings:
+            if self.consolidated_deposit:
+                bookings._create_consolidated_deposit_invoice()
+            else:
+                for booking in bookings.filtered(lambda b: b.deposit_required and not b.deposit_paid):
+                    booking._create_deposit_invoice()
+            body = _('Booking confirmed as part of block %s') % block_reference
+            bookings._message_log_batch(bodies={booking.id: body for booking in bookings})
+
+        return {
+            'name': _('Block Booking %s') % block_reference,
+            'type': 'ir.actions.act_window',
+            'res_model': 'studio.booking',
+            'view_mode': 'tree,calendar,form',
+            'domain': [('block_reference', '=', block_reference)],
+        }